@@ -0,0 +1,150 @@
+"""A real quick GUI generator for click.
+
+Only click is imported here. PyQt5 (and qdarkstyle) live in `quick._gui`,
+which is imported the first time a gui is requested or one of its names
+(`App`, `opt_to_widget`, `GListView` ...) is looked up on this module, so a
+`gui_option` decorated CLI run from the terminal never pays for Qt.
+"""
+import contextvars
+import importlib
+import os
+
+import click
+
+from ._trace import Profiler, profiler
+
+_missing = object()
+
+# threading.Event of the run executing in the current context
+_job_stop = contextvars.ContextVar("quick_job_stop", default=None)
+
+
+class Stopped(BaseException):
+    """raised in a run stopped from the gui or by its timeout
+
+    Like KeyboardInterrupt it is no Exception, `except Exception` blocks of
+    the command do not swallow it.
+    """
+
+
+def stop_requested()->bool:
+    """True once the current run is asked to stop
+
+    Commands doing long blocking calls can poll it; pure python code is
+    interrupted by `Stopped` anyway.
+    """
+    event = _job_stop.get()
+    return event is not None and event.is_set()
+
+
+def _param_default(param):
+    """`param.default`, None when unset (click >= 8.3 uses a sentinel)"""
+    default = param.default
+    if default is getattr(click.core, "UNSET", _missing):
+        return None
+    return default
+
+
+class GCommand(click.Command):
+    def __init__(self, new_thread=True, new_process=None, timeout=None,
+                 *arg, **args):
+        super(GCommand, self).__init__(*arg, **args)
+        self.new_thread = new_thread
+        # None: use the value given to gui_it, "worker": a warm process
+        self.new_process = new_process
+        # seconds before a run is stopped, None: the value given to gui_it
+        self.timeout = timeout
+
+class GOption(click.Option):
+    def __init__(self, *arg, show_name=_missing, **args):
+        super(GOption, self).__init__(*arg, **args)
+        self.show_name = show_name
+
+
+def _cache_path(*parts):
+    """path below the user cache directory of quick, parents are created"""
+    root = os.environ.get("XDG_CACHE_HOME") or \
+            os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(root, "quick", *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _data_path(*parts):
+    """path below the user data directory of quick, parents are created"""
+    root = os.environ.get("XDG_DATA_HOME") or \
+            os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(root, "quick", *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _load_gui():
+    return importlib.import_module(__name__ + "._gui")
+
+
+def __getattr__(name):
+    # the qt based part of the api is resolved lazily
+    if name.startswith("__") or name == "_gui":
+        raise AttributeError(name)
+    try:
+        return getattr(_load_gui(), name)
+    except AttributeError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        ) from None
+
+
+def gui_it(click_func, style="qdarkstyle", **argvs)->None:
+    """
+    Parameters
+    ----------
+    click_func
+    `new_thread` is used for qt-based func, like matplotlib
+    `new_process` runs the command in a child python process, "worker"
+    keeps the process with the command imported for the next runs
+    `workers` is the number of idle worker processes kept per command
+    `timeout` stops runs taking longer, in seconds
+    `max_jobs` limits the number of runs executed at the same time
+    `profile` dumps the timing of each phase when the gui is closed: True
+    prints a report, a file name ending in .json gets trace-event JSON.
+    Defaults to $QUICK_PROFILE
+    `style_scope` is "application" (default) to style every window or
+    "window" to style the windows of the gui only, before their widgets are
+    created
+    `history` is the sqlite file every run is appended to, True (default)
+    for the user data directory, False to keep no history
+    `max_tabs` keeps at most that many sub command forms built, the ones
+    used longest ago are rebuilt with their values when shown again
+    """
+    _load_gui().gui_it(click_func, style=style, **argvs)
+
+
+def launch(target, **argvs)->None:
+    """gui of the command TARGET, "package.module:attr" or "script.py:attr"
+
+    When a schema of the command is cached for the current source of the
+    module, the form is shown at once from it while the module is imported
+    in the background; the Run buttons are enabled once the import is done.
+    Otherwise the module is imported first and its schema cached for the
+    next launch. `argvs` are passed on to `gui_it`.
+    """
+    _load_gui().launch(target, **argvs)
+
+
+def gui_option(f:click.core.BaseCommand)->click.core.BaseCommand:
+    """decorator for adding '--gui' option to command"""
+    # TODO: add run_exit, new_thread
+    def run_gui_it(ctx, param, value):
+        if not value or ctx.resilient_parsing:
+            return
+        f.params = [p for p in f.params if not p.name == "gui"]
+        gui_it(f)
+        ctx.exit()
+    return click.option('--gui', is_flag=True, callback=run_gui_it,
+                        help="run with gui",
+                        expose_value=False, is_eager=False)(f)
+
+
+# needs GCommand and GOption
+from ._schema import command_schema, schema_command
@@ -0,0 +1,20 @@
+"""python -m quick TARGET: the gui of a command, see `quick.launch`"""
+import click
+
+from . import launch
+
+
+@click.command()
+@click.argument("target")
+@click.option("--new-process", is_flag=True,
+              help="run the command in a child python process")
+@click.option("--worker", is_flag=True,
+              help="run the command in a child process kept between runs")
+@click.option("--style", default="qdarkstyle")
+def main(target, new_process, worker, style):
+    """show the gui of TARGET, "package.module:attr" or "script.py:attr\""""
+    launch(target, new_process="worker" if worker else new_process,
+           style=style)
+
+
+main(prog_name="python -m quick")
@@ -0,0 +1,3507 @@
+import sys
+import os
+from functools import partial
+import asyncio
+import codecs
+import collections
+import contextvars
+import ctypes
+import importlib
+import inspect
+import itertools
+import json
+import math
+import mmap
+import shlex
+import tempfile
+import threading
+import time
+import weakref
+
+import click
+from click import _termui_impl
+
+from PyQt5 import QtGui
+from PyQt5 import QtWidgets
+from PyQt5 import QtCore
+from PyQt5 import sip
+
+from . import _missing, _param_default, _cache_path
+from . import _job_stop, Stopped
+from . import _runner
+from . import _schema
+from . import _sweep
+from ._history import History
+from ._trace import profiler, profile_target
+
+
+_GTypeRole = QtCore.Qt.UserRole
+# stream of the job running in the current thread (or task), see StreamRouter
+_job_stream = contextvars.ContextVar("quick_job_stream", default=None)
+
+def _import_qdarkstyle():
+    try:
+        import qdarkstyle
+        return qdarkstyle
+    except ModuleNotFoundError:
+        return None
+
+class GStyle(object):
+    _base_style = """
+        ._OptionLabel {
+            font-size: 16px;
+            font: bold;
+            font-family: monospace;
+            }
+        ._HelpLabel {
+            font-family: serif;
+            font-size: 14px;
+            }
+        ._InputComboBox{
+            font-size: 16px;
+            }
+        ._InputLineEdit{
+            font-size: 16px;
+            }
+        ._InputCheckBox{
+            font-size: 16px;
+            }
+        ._InputSpinBox{
+            font-size: 16px;
+            }
+        ._InputTabWidget{
+            font: bold;
+            font-size: 16px;
+            }
+        .GListView{
+            font-size: 16px;
+            }
+        QToolTip{
+            font-family: serif;
+            }
+        """
+    # combined stylesheets by style name
+    _cache = {}
+
+    def __init__(self, style=""):
+        if not GStyle.check_style(style):
+            self.text_color = "black"
+            self.placehoder_color = "#898b8d"
+            self.stylesheet = GStyle._cache.get("") or GStyle._base_style +\
+                    """
+                    ._Spliter{
+                        border: 1px inset gray;
+                        }
+                    """
+            GStyle._cache[""] = self.stylesheet
+        elif style == "qdarkstyle":
+            self.text_color = '#eff0f1'
+            self.placehoder_color = "#898b8d"
+            self.stylesheet = GStyle._cache.get(style) or \
+                    GStyle.load_stylesheet(style) +\
+                    GStyle._base_style +\
+                    """
+                    .GListView{
+                        padding: 5px;
+                        }
+                    ._Spliter{
+                        border: 5px solid gray;
+                        }
+                    """
+            GStyle._cache[style] = self.stylesheet
+
+
+    @staticmethod
+    def check_style(style):
+        if style == "qdarkstyle":
+            return _import_qdarkstyle() is not None
+        return False
+
+    @staticmethod
+    def load_stylesheet(style):
+        """stylesheet of a third-party `style`, cached on disk
+
+        The cache is keyed by the style name and version. Qt resource
+        modules imported by the style (its icons) are recorded and imported
+        again when the cached stylesheet is used.
+        """
+        module = _import_qdarkstyle()
+        path = _cache_path("styles", "{}-{}.json".format(
+            style, getattr(module, "__version__", "0")))
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            for name in cached["resources"]:
+                importlib.import_module(name)
+            return cached["stylesheet"]
+        except (OSError, ValueError, KeyError, ImportError):
+            pass
+        before = set(sys.modules)
+        stylesheet = module.load_stylesheet_pyqt5()
+        resources = sorted(name for name in set(sys.modules) - before
+                           if name.startswith(module.__name__ + ".")
+                           and name.endswith("_rc"))
+        try:
+            with open(path, "w") as f:
+                json.dump({"stylesheet": stylesheet, "resources": resources}, f)
+        except OSError:
+            pass
+        return stylesheet
+
+    def apply(self, target):
+        """set the stylesheet on `target`, a QApplication or a widget
+
+        Setting a stylesheet re-polishes every widget below `target`, so it
+        is skipped when `target` already has it. Apply it before the widgets
+        are created to polish them only once.
+        """
+        if target.styleSheet() != self.stylesheet:
+            target.setStyleSheet(self.stylesheet)
+
+_gstyle = GStyle()
+
+
+class GListView(QtWidgets.QListView):
+    def __init__(self, opt):
+        super(GListView, self).__init__()
+        self.nargs = opt.nargs
+        self.model = GItemModel(opt.nargs, parent=self, opt_type=opt.type, default=_param_default(opt))
+        self.setModel(self.model)
+        self.delegate = GEditDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        # rows all have the same height, lets the view skip measuring them
+        self.setUniformItemSizes(True)
+        if self.nargs == -1:
+            self.setToolTip(
+                    "'a': add a new item blow the selected one\n"
+                    "'d': delete the selected item\n"
+                    "ctrl+v: add one item per line of the clipboard"
+            )
+            self.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+            for label, slot in [("Add", self.add_item),
+                                ("Delete", self.delete_selected),
+                                ("Paste", self.paste),
+                                ("Import from file ...", self.import_file),
+                                ("Clear", self.model.clear)]:
+                action = QtWidgets.QAction(label, self)
+                action.triggered.connect(slot)
+                self.addAction(action)
+
+    def selected_rows(self):
+        return sorted({i.row() for i in self.selectedIndexes()})
+
+    def keyPressEvent(self, e):
+        if self.nargs == -1:
+            if e.key() == QtCore.Qt.Key_A:
+                self.add_item()
+            if e.key() == QtCore.Qt.Key_D:
+                self.delete_selected()
+            if e.matches(QtGui.QKeySequence.Paste):
+                self.paste()
+                return
+        super(GListView, self).keyPressEvent(e)
+
+    @QtCore.pyqtSlot()
+    def add_item(self):
+        rows = self.selected_rows()
+        if not rows:
+            self.model.insert_values(0, [""])
+        # bottom up, the rows above keep their index
+        for row in reversed(rows):
+            self.model.insert_values(row+1, [""])
+
+    @QtCore.pyqtSlot()
+    def delete_selected(self):
+        self.model.remove_rows(self.selected_rows())
+
+    def append_values(self, values):
+        rows = self.selected_rows()
+        row = rows[-1] + 1 if rows else self.model.rowCount()
+        self.model.insert_values(row, values)
+
+    @QtCore.pyqtSlot()
+    def paste(self):
+        text = QtWidgets.QApplication.clipboard().text()
+        self.append_values([l for l in text.splitlines() if l.strip()])
+
+    @QtCore.pyqtSlot()
+    def import_file(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import items")
+        if path:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                self.append_values([l.rstrip("\r\n") for l in f
+                                    if l.strip()])
+
+
+class GItemModel(QtCore.QAbstractListModel):
+    """the values of a GListView
+
+    Values live in a plain python list of strings. Rows are inserted and
+    removed in contiguous blocks, the type, placeholder and brushes of
+    the rows are computed once.
+    """
+    def __init__(self, n, parent=None, opt_type=click.STRING, default=None):
+        super(GItemModel, self).__init__(parent)
+        self.type = opt_type
+        if isinstance(opt_type, click.types.Tuple):
+            self._types = list(opt_type.types)
+            self._type = click.STRING
+        else:
+            self._types = []
+            self._type = opt_type if isinstance(
+                    opt_type, click.types.ParamType) else click.STRING
+        self._placeholder_brush = QtGui.QBrush(
+                QtGui.QColor(_gstyle.placehoder_color))
+        self._text_brush = QtGui.QBrush(QtGui.QColor(_gstyle.text_color))
+        values = []
+        for row in range(n):
+            if hasattr(default, "__len__"):
+                values.append(default[row])
+            else:
+                values.append(default)
+        self._values = ["" if v is None else str(v) for v in values]
+
+    def type_of(self, row):
+        if 0 <= row < len(self._types):
+            return self._types[row]
+        return self._type
+
+    def placeholder(self, row):
+        if 0 <= row < len(self._types):
+            return self._types[row].name
+        return self.type.name
+
+    def values(self):
+        return list(self._values)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._values)
+
+    def flags(self, index):
+        return super(GItemModel, self).flags(index) | \
+                QtCore.Qt.ItemIsEditable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        row = index.row()
+        if not index.isValid() or row >= len(self._values):
+            return None
+        value = self._values[row]
+        if role == QtCore.Qt.DisplayRole:
+            return value or self.placeholder(row)
+        if role == QtCore.Qt.EditRole:
+            return value
+        if role == QtCore.Qt.ForegroundRole:
+            return self._text_brush if value else self._placeholder_brush
+        if role == _GTypeRole:
+            return self.type_of(row)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.EditRole or not index.isValid():
+            return False
+        self._values[index.row()] = "" if value is None else str(value)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def insertRows(self, row, count, parent=QtCore.QModelIndex()):
+        self.insert_values(row, [""] * count)
+        return True
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        if count <= 0:
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row + count - 1)
+        del self._values[row:row+count]
+        self.endRemoveRows()
+        return True
+
+    def insert_values(self, row, values):
+        """insert `values` before `row` with a single model update"""
+        if not values:
+            return
+        row = min(max(row, 0), len(self._values))
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(values) - 1)
+        self._values[row:row] = [str(v) for v in values]
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        """remove `rows`, one model update per contiguous block"""
+        blocks = []
+        for row in sorted(set(rows)):
+            if blocks and blocks[-1][1] == row:
+                blocks[-1][1] = row + 1
+            else:
+                blocks.append([row, row + 1])
+        for start, stop in reversed(blocks):
+            self.removeRows(start, stop - start)
+
+    @QtCore.pyqtSlot()
+    def clear(self):
+        self.beginResetModel()
+        self._values = []
+        self.endResetModel()
+
+class GEditDelegate(QtWidgets.QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        tp = index.data(role=_GTypeRole)
+        if isinstance(tp, click.Path):
+            led = GLineEdit_path.from_option(tp, parent)
+        else:
+            led = QtWidgets.QLineEdit(parent)
+        led.setPlaceholderText(tp.name)
+        led.setValidator(select_type_validator(tp))
+        return led
+
+    def setEditorData(self, editor, index):
+        item_var = index.data(role=QtCore.Qt.EditRole)
+        if item_var is not None:
+            editor.setText(str(item_var))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text())
+
+def generate_label(opt):
+    show_name = getattr(opt, 'show_name', _missing)
+    show_name = opt.name if show_name is _missing else show_name
+    param = _OptionLabel(show_name)
+    param.setToolTip(getattr(opt, 'help', None))
+    return param
+
+
+class GStringLineEditor(click.types.StringParamType):
+    def to_widget(self, opt, validator=None):
+        value = _InputLineEdit()
+        value.setPlaceholderText(self.name)
+        if _param_default(opt):
+            value.setText(str(opt.default))
+        if getattr(opt, "hide_input", False):
+            value.setEchoMode(QtWidgets.QLineEdit.Password)
+        value.setValidator(validator)
+
+        def to_command():
+            return [opt.opts[0], value.text()]
+        return [generate_label(opt), value], to_command
+
+
+class GIntLineEditor(GStringLineEditor):
+    def to_widget(self, opt):
+        return GStringLineEditor.to_widget(self, opt,
+                validator=QtGui.QIntValidator())
+
+class GFloatLineEditor(GStringLineEditor):
+    def to_widget(self, opt):
+        return GStringLineEditor.to_widget(self, opt,
+                validator=QtGui.QDoubleValidator())
+
+class GFileDialog(QtWidgets.QFileDialog):
+    def __init__(self, *args, exists = False, file_okay = True, dir_okay= True,  **kwargs):
+        super(GFileDialog, self).__init__(*args, **kwargs)
+        self.setOption(QtWidgets.QFileDialog.DontUseNativeDialog, True)
+        self.setLabelText(QtWidgets.QFileDialog.Accept, "Select")
+        if (exists, file_okay, dir_okay) == (True, True, False):
+            self.setFileMode(QtWidgets.QFileDialog.ExistingFile)
+        elif (exists, file_okay, dir_okay) == (False, True, False):
+            self.setFileMode(QtWidgets.QFileDialog.AnyFile)
+        elif (exists, file_okay, dir_okay) == (True, False, True):
+            self.setFileMode(QtWidgets.QFileDialog.Directory)
+        elif (exists, file_okay, dir_okay) == (False, False, True):
+            self.setFileMode(QtWidgets.QFileDialog.Directory)
+        elif exists == True:
+            self.setFileMode(QtWidgets.QFileDialog.ExistingFile)
+            self.accept = self.accept_all
+        elif exists == False:
+            self.setFileMode(QtWidgets.QFileDialog.AnyFile)
+            self.accept = self.accept_all
+
+
+    def accept_all(self):
+        super(GFileDialog, self).done(QtWidgets.QFileDialog.Accepted)
+
+    _pool = {}
+
+    @classmethod
+    def shared(cls, exists=False, file_okay=True, dir_okay=True):
+        """dialog shared by all path editors with the same mode
+
+        It is created on first use and kept, so its directory model (and
+        last visited folder) is reused by the next opening.
+        """
+        key = (bool(exists), bool(file_okay), bool(dir_okay))
+        dialog = cls._pool.get(key)
+        if dialog is None:
+            dialog = cls(None, "Select File Dialog", "./", "*",
+                         exists=exists, file_okay=file_okay, dir_okay=dir_okay)
+            if not cls._pool:
+                QtWidgets.QApplication.instance().aboutToQuit.connect(
+                        cls.clear_pool)
+            cls._pool[key] = dialog
+        return dialog
+
+    @classmethod
+    def clear_pool(cls):
+        for dialog in cls._pool.values():
+            dialog.deleteLater()
+        cls._pool.clear()
+
+class _ListDirectory(QtCore.QRunnable):
+    def __init__(self, path, done):
+        super(_ListDirectory, self).__init__()
+        self.path = path
+        self.done = done
+
+    def run(self):
+        entries = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, is_dir))
+        except OSError:
+            pass
+        self.done.emit(self.path, entries)
+
+
+class DirectoryCache(QtCore.QObject):
+    """directory listings, read by worker threads
+
+    `entries` never touches the file system itself: it returns what is
+    cached (possibly older than `max_age` seconds, which triggers a
+    refresh) or None, and `listed` is emitted when a listing arrives.
+    At most `max_dirs` listings are kept.
+    """
+    listed = QtCore.pyqtSignal(str)
+    _listed = QtCore.pyqtSignal(str, object)
+
+    _instance = None
+
+    def __init__(self, max_age=30, max_dirs=64, parent=None):
+        super(DirectoryCache, self).__init__(parent)
+        self.max_age = max_age
+        self.max_dirs = max_dirs
+        self._entries = collections.OrderedDict()
+        self._pending = set()
+        self.threadpool = QtCore.QThreadPool(self)
+        self.threadpool.setMaxThreadCount(2)
+        self._listed.connect(self._store)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(os.path.expanduser(path or "."))
+
+    def entries(self, path):
+        """sorted `(name, is_dir)` of the directory `path` or None"""
+        path = self.key(path)
+        cached = self._entries.get(path)
+        if cached is not None:
+            self._entries.move_to_end(path)
+        if cached is None or time.time() - cached[0] > self.max_age:
+            if path not in self._pending:
+                self._pending.add(path)
+                self.threadpool.start(_ListDirectory(path, self._listed))
+        return None if cached is None else cached[1]
+
+    @QtCore.pyqtSlot(str, object)
+    def _store(self, path, entries):
+        self._pending.discard(path)
+        entries.sort()
+        self._entries[path] = (time.time(), entries)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_dirs:
+            self._entries.popitem(last=False)
+        self.listed.emit(path)
+
+
+class GLineEdit_path(QtWidgets.QLineEdit):
+    _dir_icon = None
+
+    def __init__(self, parent=None, exists = False, file_okay = True, dir_okay= True):
+        super(GLineEdit_path, self).__init__(parent)
+        if GLineEdit_path._dir_icon is None:
+            GLineEdit_path._dir_icon = self.style().standardIcon(
+                    QtWidgets.QStyle.SP_DirIcon)
+        self.action = self.addAction(
+                GLineEdit_path._dir_icon,
+                QtWidgets.QLineEdit.TrailingPosition
+                )
+        # the dialog is only looked up when the icon is clicked
+        self.mode = dict(exists=exists, file_okay=file_okay, dir_okay=dir_okay)
+        self.action.triggered.connect(self.run_dialog)
+        self._completion_dir = None
+        self._completion_entries = None
+        self.textEdited.connect(self.complete_path)
+
+    @QtCore.pyqtSlot(str)
+    def complete_path(self, text):
+        """offer the entries of the typed directory, listed in background"""
+        head = text[:len(text) - len(os.path.basename(text))]
+        cache = DirectoryCache.instance()
+        if self.completer() is None:
+            completer = QtWidgets.QCompleter([], self)
+            completer.setModelSorting(
+                    QtWidgets.QCompleter.CaseSensitivelySortedModel)
+            self.setCompleter(completer)
+            cache.listed.connect(self._directory_listed)
+        self._completion_dir = cache.key(head)
+        entries = cache.entries(head)
+        if entries is None or entries is self._completion_entries:
+            return
+        self._completion_entries = entries
+        file_okay = self.mode["file_okay"]
+        self.completer().model().setStringList(sorted(
+            head + name + (os.sep if is_dir else "")
+            for name, is_dir in entries if is_dir or file_okay))
+        if self.hasFocus():
+            self.completer().setCompletionPrefix(text)
+            self.completer().complete()
+
+    @QtCore.pyqtSlot(str)
+    def _directory_listed(self, path):
+        if path == self._completion_dir:
+            self.complete_path(self.text())
+
+    @property
+    def fdlg(self):
+        return GFileDialog.shared(**self.mode)
+
+    def run_dialog(self):
+        fdlg = self.fdlg
+        if self.text():
+            fdlg.selectFile(self.text())
+        if fdlg.exec() == QtWidgets.QFileDialog.Accepted:
+            self.setText(fdlg.selectedFiles()[0])
+
+    @staticmethod
+    def from_option(opt, parent=None):
+        return GLineEdit_path(
+            parent=parent,
+            exists=opt.exists,
+            file_okay=opt.file_okay,
+            dir_okay=opt.dir_okay
+        )
+
+class GPathGLindEidt_path(click.types.Path):
+    def to_widget(self, opt):
+        value = GLineEdit_path(
+            exists=self.exists,
+            file_okay=self.file_okay,
+            dir_okay=self.dir_okay
+        )
+        value.setPlaceholderText(self.name)
+        if _param_default(opt):
+            value.setText(str(opt.default))
+
+        def to_command():
+            return [opt.opts[0], value.text()]
+        return [generate_label(opt), value], to_command
+
+class _GLabeledSlider(QtWidgets.QSlider):
+    def __init__(self, min, max, val):
+        super(_GLabeledSlider, self).__init__(QtCore.Qt.Horizontal)
+        self.min, self.max = min, max
+
+        self.setMinimum(min)
+        self.setMaximum(max)
+        self.setValue(val)
+
+        self.label = self.__init_label()
+
+    def __init_label(self):
+        l = max( [
+            math.ceil(math.log10(abs(x))) if x != 0 else 1
+            for x in [self.min, self.max]
+            ])
+        l += 1
+        return QtWidgets.QLabel('0'*l)
+
+def argument_command(to_command):
+    def tc():
+        a = to_command()
+        return a[1:]
+    return tc
+
+class GSlider(QtWidgets.QHBoxLayout):
+    def __init__(self, min=0, max=10, default=None,  *args, **kwargs):
+        super(QtWidgets.QHBoxLayout, self).__init__()
+
+        self.min, self.max, self.default = min, max, default
+        self.label = self.__init_label()
+        self.slider = self.__init_slider()
+
+        self.label.setText(str(self.default))
+
+        self.addWidget(self.slider)
+        self.addWidget(self.label)
+
+    def value(self):
+        return self.slider.value()
+
+    def __init_slider(self):
+        slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        slider.setMinimum(self.min)
+        slider.setMaximum(self.max)
+        default_val = (self.min+self.max)//2
+        if isinstance(self.default, int):
+            if self.min <= self.default <= self.max:
+                default_val = self.default
+        self.default = default_val
+        slider.setValue(default_val)
+        slider.valueChanged.connect(lambda x: self.label.setText(str(x)))
+        return slider
+
+    def __init_label(self):
+        l = max( [
+            math.ceil(math.log10(abs(x))) if x != 0 else 1
+            for x in [self.min, self.max]
+            ])
+        l += 1
+        return QtWidgets.QLabel('0'*l)
+
+
+class GIntRangeGSlider(click.types.IntRange):
+    def to_widget(self, opt):
+        value = GSlider(
+                min=self.min,
+                max=self.max,
+                default=_param_default(opt)
+                )
+
+        def to_command():
+            return [opt.opts[0], str(value.value())]
+        return [generate_label(opt), value], to_command
+
+
+class GIntRangeSlider(click.types.IntRange):
+    def to_widget(self, opt):
+        value = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        value.setMinimum(self.min)
+        value.setMaximum(self.max)
+
+        default_val = (self.min+self.max)//2
+        if isinstance(opt.default, int):
+            if self.min <= opt.default <= self.max:
+                default_val = opt.default
+        value.setValue(default_val)
+
+        def to_command():
+            return [opt.opts[0], str(value.value())]
+        return [generate_label(opt), value], to_command
+
+class GIntRangeLineEditor(click.types.IntRange):
+    def to_widget(self, opt):
+        value = QtWidgets.QLineEdit()
+        # TODO: set validator
+
+        def to_command():
+            return [opt.opts[0], value.text()]
+        return [generate_label(opt), value], to_command
+
+def bool_flag_option(opt):
+    checkbox = _InputCheckBox(opt.name)
+    if _param_default(opt):
+        checkbox.setCheckState(2)
+    # set tip
+    checkbox.setToolTip(opt.help)
+
+    def to_command():
+        if checkbox.checkState():
+            return [opt.opts[0]]
+        else:
+            return opt.secondary_opts
+    return [checkbox], to_command
+
+class GChoiceComboBox(click.types.Choice):
+    def to_widget(self, opt):
+        cb = _InputComboBox()
+        cb.addItems(self.choices)
+
+        def to_command():
+            return [opt.opts[0], cb.currentText()]
+        return [generate_label(opt), cb], to_command
+
+def count_option(opt):
+    sb = _InputSpinBox()
+
+    def to_command():
+        return [opt.opts[0]] * int(sb.text())
+    return [generate_label(opt), sb], to_command
+
+class GTupleGListView(click.Tuple):
+    def to_widget(self, opt):
+        view = GListView(opt)
+
+        def to_command():
+            return [opt.opts[0]] + view.model.values()
+        return [generate_label(opt), view], to_command
+
+
+def multi_text_arguement(opt):
+    value = GListView(opt)
+    def to_command():
+        _ = value.model.values()
+        # if opt.required and value.model.rowCount() == 0:
+            # raise click.exceptions.BadParameter("Required")
+        # print(opt.__dict__)
+        return _
+    # return [QtWidgets.QLabel(opt.name), value], to_command
+    return [_OptionLabel(opt.name), value], to_command
+
+def select_type_validator(tp: click.types.ParamType)-> QtGui.QValidator:
+    """ select the right validator for `tp`"""
+    if isinstance(tp, click.types.IntParamType):
+        return QtGui.QIntValidator()
+    elif isinstance(tp, click.types.FloatParamType):
+        return QtGui.QDoubleValidator()
+    return None
+
+
+def select_opt_validator(opt):
+    """ select the right validator for `opt`"""
+    return select_type_validator(opt.type)
+
+class WidgetRegistry(object):
+    """maps click parameter types and option traits to widget factories
+
+    A factory takes the click parameter and returns `(widgets, to_command)`
+    like `opt_to_widget`. Traits (predicates on the parameter, e.g.
+    `is_bool_flag`) are tried first in registration order, then the
+    factory of the closest class in the MRO of `type(opt.type)` is used.
+    The MRO lookup is cached per class.
+    """
+    def __init__(self):
+        self._traits = []
+        self._types = {}
+        self._cache = {}
+
+    def register(self, type_cls, factory=None):
+        """register `factory` for `type_cls` and its subclasses
+
+        Can be used as a decorator: `@registry.register(MyType)`
+        """
+        if factory is None:
+            return partial(self.register, type_cls)
+        self._types[type_cls] = factory
+        self._cache.clear()
+        return factory
+
+    def register_trait(self, predicate, factory=None):
+        """register `factory` for the parameters `predicate(opt)` is true"""
+        if factory is None:
+            return partial(self.register_trait, predicate)
+        self._traits.append((predicate, factory))
+        return factory
+
+    def resolve(self, type_cls):
+        try:
+            return self._cache[type_cls]
+        except KeyError:
+            pass
+        factory = None
+        for cls in type_cls.__mro__:
+            if cls in self._types:
+                factory = self._types[cls]
+                break
+        self._cache[type_cls] = factory
+        return factory
+
+    def factory(self, opt):
+        for predicate, factory in self._traits:
+            if predicate(opt):
+                return factory
+        return self.resolve(type(opt.type))
+
+    def to_widget(self, opt):
+        return self.factory(opt)(opt)
+
+
+def _type_factory(widget_type):
+    """factory calling `widget_type.to_widget` with the option type as self"""
+    def factory(opt):
+        return widget_type.to_widget(opt.type, opt)
+    return factory
+
+
+widget_registry = WidgetRegistry()
+register_widget = widget_registry.register
+
+widget_registry.register_trait(lambda opt: opt.nargs > 1,
+                               _type_factory(GTupleGListView))
+widget_registry.register_trait(lambda opt: getattr(opt, "is_bool_flag", False),
+                               bool_flag_option)
+widget_registry.register_trait(lambda opt: getattr(opt, "count", False),
+                               count_option)
+widget_registry.register(click.types.ParamType,
+                         _type_factory(GStringLineEditor))
+widget_registry.register(click.types.Choice, _type_factory(GChoiceComboBox))
+widget_registry.register(click.types.Path, _type_factory(GPathGLindEidt_path))
+widget_registry.register(click.types.IntRange, _type_factory(GIntRangeGSlider))
+widget_registry.register(click.types.IntParamType,
+                         _type_factory(GIntLineEditor))
+widget_registry.register(click.types.FloatParamType,
+                         _type_factory(GFloatLineEditor))
+
+
+def opt_to_widget(opt):
+    return widget_registry.to_widget(opt)
+
+def _to_widget(opt):
+    #customed widget
+    if isinstance(opt.type, click.types.FuncParamType):
+        if hasattr(opt.type.func, 'to_widget'):
+            return opt.type.func.to_widget()
+    elif hasattr(opt.type, 'to_widget'):
+            return opt.type.to_widget()
+
+    if isinstance(opt, click.core.Argument):
+        if opt.nargs == 1:
+            w, tc = opt_to_widget(opt)
+            return w, argument_command(tc)
+        elif (opt.nargs > 1 or opt.nargs == -1):
+            return multi_text_arguement(opt)
+    else:
+        return opt_to_widget(opt)
+
+
+def layout_append_opts(layout, opts):
+    params_func = []
+    widgets = []
+    i = 0
+    for i, para in enumerate(opts):
+        widget, value_func = _to_widget(para)
+        widgets.append(widget)
+        params_func.append(value_func)
+        for idx, w in enumerate(widget):
+            if isinstance(w, QtWidgets.QLayout):
+                layout.addLayout(w, i, idx)
+            else:
+                layout.addWidget(w, i, idx)
+    return layout, params_func, widgets
+
+def generate_sysargv(cmd_list):
+    argv_list = []
+    for name, func_list in cmd_list:
+        argv_list.append(name)
+        for value_func in func_list:
+            argv_list += value_func()
+    return argv_list
+
+def param_value(param, tokens):
+    """value of `param` in its command line `tokens`, as kept in the history"""
+    if isinstance(param, click.Option):
+        if param.count:
+            return str(len(tokens))
+        if param.is_flag:
+            return "true" if tokens[:1] == param.opts[:1] else "false"
+    return " ".join(param_tokens(param, tokens))
+
+def param_tokens(param, tokens):
+    """the values in the command line `tokens` of `param`, names dropped"""
+    if isinstance(param, click.Option):
+        names = set(param.opts + param.secondary_opts)
+        return [t for t in tokens if t not in names]
+    return list(tokens)
+
+def param_input(param, tokens):
+    """what click hands to `param.type_cast_value` for `tokens`, None if empty"""
+    values = param_tokens(param, tokens)
+    if param.nargs == 1 and not param.multiple:
+        values = values[0] if values else ""
+    return values if values not in ("", []) else None
+
+def widget_state(widget):
+    """json-able value of an input widget, None for labels and the like"""
+    if isinstance(widget, GListView):
+        return widget.model.values()
+    elif isinstance(widget, QtWidgets.QLineEdit):
+        return widget.text()
+    elif isinstance(widget, QtWidgets.QComboBox):
+        return widget.currentText()
+    elif isinstance(widget, QtWidgets.QAbstractButton) and widget.isCheckable():
+        return widget.isChecked()
+    elif isinstance(widget, (GSlider, QtWidgets.QAbstractSlider,
+                             QtWidgets.QSpinBox, QtWidgets.QDoubleSpinBox)):
+        return widget.value()
+    return None
+
+def value_widget_state(widget, value):
+    """`widget_state` of `widget` showing the `param_value` `value`"""
+    state = widget_state(widget)
+    if state is None:
+        return None
+    if isinstance(widget, GListView):
+        return value.split()
+    if isinstance(state, bool):
+        return value == "true"
+    try:
+        return type(state)(value)
+    except ValueError:
+        return state
+
+def set_widget_state(widget, state):
+    """inverse of `widget_state`"""
+    if state is None:
+        return
+    if isinstance(widget, GListView):
+        widget.model.clear()
+        widget.model.insert_values(0, state)
+    elif isinstance(widget, QtWidgets.QLineEdit):
+        widget.setText(state)
+    elif isinstance(widget, QtWidgets.QComboBox):
+        widget.setCurrentText(state)
+    elif isinstance(widget, QtWidgets.QAbstractButton):
+        widget.setChecked(state)
+    elif isinstance(widget, GSlider):
+        widget.slider.setValue(state)
+    elif isinstance(widget, (QtWidgets.QAbstractSlider,
+                             QtWidgets.QSpinBox, QtWidgets.QDoubleSpinBox)):
+        widget.setValue(state)
+
+def touches_files(param):
+    """True if the type of `param` looks at the file system"""
+    types = getattr(param.type, "types", None) or [param.type]
+    return any(isinstance(t, (click.Path, click.File)) for t in types)
+
+def check_value(cmd, param, value):
+    """click's error message for `value` of `param`, None if it is valid
+
+    The value goes through `param.type_cast_value` in a context of its own,
+    closed right away. A `click.File` is never opened: a file to read only
+    has to exist.
+    """
+    types = getattr(param.type, "types", None) or [param.type]
+    if any(isinstance(t, click.File) for t in types):
+        if not isinstance(param.type, click.File) or \
+                "r" not in param.type.mode:
+            return None
+        paths = value if isinstance(value, (list, tuple)) else [value]
+        for path in paths:
+            if path != "-" and not os.path.isfile(path):
+                return "'{}': No such file.".format(path)
+        return None
+    ctx = click.Context(cmd, info_name=cmd.name)
+    try:
+        with ctx:
+            param.type_cast_value(ctx, value)
+    except click.ClickException as e:
+        return e.format_message()
+    except Exception as e:
+        # custom types may fail with anything
+        return str(e) or repr(e)
+    return None
+
+def widget_changed_signals(widget):
+    """signals emitted when the value of an input widget changes"""
+    if isinstance(widget, GListView):
+        model = widget.model
+        return [model.dataChanged, model.rowsInserted, model.rowsRemoved,
+                model.modelReset]
+    elif isinstance(widget, QtWidgets.QLineEdit):
+        return [widget.textChanged]
+    elif isinstance(widget, QtWidgets.QComboBox):
+        return [widget.currentTextChanged]
+    elif isinstance(widget, QtWidgets.QAbstractButton) and widget.isCheckable():
+        return [widget.toggled]
+    elif isinstance(widget, GSlider):
+        return [widget.slider.valueChanged]
+    elif isinstance(widget, (QtWidgets.QAbstractSlider,
+                             QtWidgets.QSpinBox, QtWidgets.QDoubleSpinBox)):
+        return [widget.valueChanged]
+    return []
+
+class _Spliter(QtWidgets.QFrame):
+    def __init__(self, parent=None):
+        super(_Spliter, self).__init__( parent=parent)
+        self.setFrameShape(QtWidgets.QFrame.HLine)
+
+class _InputComboBox(QtWidgets.QComboBox):
+    pass
+
+class _InputTabWidget(QtWidgets.QTabWidget):
+    """Tab widget whose pages are built on first activation"""
+    def __init__(self, parent=None, cache=None):
+        super(_InputTabWidget, self).__init__(parent)
+        # `TabCache` told about every activation
+        self.cache = cache
+        self.currentChanged.connect(self.build_tab)
+
+    def add_lazy_tab(self, builder, label):
+        """add a placeholder tab, `builder()` returns the real layout"""
+        return self.addTab(_LazyTab(builder), label)
+
+    @QtCore.pyqtSlot(int)
+    def build_tab(self, index):
+        page = self.widget(index)
+        if isinstance(page, _LazyTab):
+            page.build()
+            if self.cache is not None:
+                self.cache.touch(page)
+
+class _LazyTab(QtWidgets.QWidget):
+    def __init__(self, builder, parent=None):
+        super(_LazyTab, self).__init__(parent)
+        self.builder = builder
+        self.content = None
+        self.container = None
+        # `CommandLayout.snapshot` of the torn down content
+        self.saved = None
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.add_placeholder()
+
+    def add_placeholder(self):
+        self.placeholder = QtWidgets.QLabel("Loading ...")
+        self.placeholder.setAlignment(QtCore.Qt.AlignCenter)
+        self.layout().addWidget(self.placeholder)
+
+    def is_built(self):
+        return self.content is not None
+
+    def build(self):
+        if self.is_built():
+            return self.content
+        self.content = self.builder()
+        self.layout().removeWidget(self.placeholder)
+        self.placeholder.deleteLater()
+        self.placeholder = None
+        # the widgets of the content live in the container, dropping it
+        # drops them all
+        self.container = QtWidgets.QWidget()
+        self.content.setContentsMargins(0, 0, 0, 0)
+        self.container.setLayout(self.content)
+        self.layout().addWidget(self.container)
+        if self.saved is not None:
+            self.content.restore(self.saved)
+            self.saved = None
+        return self.content
+
+    def snapshot(self):
+        return self.content.snapshot() if self.is_built() else self.saved
+
+    def unbuild(self):
+        """delete the content, its field values are kept for `build`"""
+        if not self.is_built():
+            return
+        self.saved = self.content.snapshot()
+        self.layout().removeWidget(self.container)
+        self.container.hide()
+        self.container.deleteLater()
+        self.container = self.content = None
+        self.add_placeholder()
+
+    def is_shown(self):
+        """True if this page and every page around it are current tabs"""
+        parent = self.parentWidget()
+        while parent is not None:
+            if isinstance(parent, QtWidgets.QTabWidget):
+                current = parent.currentWidget()
+                if current is not self and not current.isAncestorOf(self):
+                    return False
+            parent = parent.parentWidget()
+        return True
+
+
+class TabCache(QtCore.QObject):
+    """built `_LazyTab` pages, by last activation
+
+    Once more than `max_tabs` pages are built the ones activated longest
+    ago, unless shown, are torn down; their field values are restored when
+    they are built again. None keeps every page.
+    """
+    def __init__(self, max_tabs=None, parent=None):
+        super(TabCache, self).__init__(parent)
+        self.max_tabs = max_tabs
+        self.pages = collections.OrderedDict()
+
+    def touch(self, page):
+        if page not in self.pages:
+            page.destroyed.connect(partial(self.pages.pop, page, None))
+        self.pages[page] = None
+        self.pages.move_to_end(page)
+        self.evict()
+
+    def evict(self):
+        if self.max_tabs is None:
+            return
+        for page in list(self.pages):
+            if len(self.pages) <= self.max_tabs:
+                break
+            if page not in self.pages or page.is_shown():
+                continue
+            page.unbuild()
+            # built sub command pages go with it, into its snapshot
+            for other in list(self.pages):
+                if other is page or page.isAncestorOf(other):
+                    del self.pages[other]
+
+class _HelpLabel(QtWidgets.QLabel):
+    pass
+
+class _OptionLabel(QtWidgets.QLabel):
+    pass
+
+class _InputLineEdit(QtWidgets.QLineEdit):
+    pass
+
+class _InputCheckBox(QtWidgets.QCheckBox):
+    pass
+
+class _InputSpinBox(QtWidgets.QSpinBox):
+    pass
+
+class _FilterLineEdit(QtWidgets.QLineEdit):
+    pass
+
+_search_indexes = weakref.WeakKeyDictionary()
+
+def param_search_text(param):
+    """lower case names, show_name and help of `param`, what a filter matches"""
+    words = [param.name or ""] + param.opts + param.secondary_opts
+    show_name = getattr(param, "show_name", _missing)
+    if show_name is not _missing and show_name:
+        words.append(show_name)
+    words.append(getattr(param, "help", None) or "")
+    return " ".join(words).lower()
+
+def search_index(cmd):
+    """`(own, tree)` search texts of the parameters of `cmd`
+
+    `own` follows `cmd.params`, `tree` holds the parameters of the whole
+    command tree below `cmd`. Computed once per command.
+    """
+    index = _search_indexes.get(cmd)
+    if index is None:
+        own = [param_search_text(p) for p in cmd.params]
+        tree = list(own)
+        for sub in getattr(cmd, "commands", {}).values():
+            tree += search_index(sub)[1]
+        index = _search_indexes[cmd] = (own, tree)
+    return index
+
+def text_matches(text, terms):
+    return all(term in text for term in terms)
+
+class _ValidateSignals(QtCore.QObject):
+    # parameter index, generation, cache key, error message or None
+    done = QtCore.pyqtSignal(int, int, object, object)
+
+
+class _ValidateParam(QtCore.QRunnable):
+    def __init__(self, cmd, param, value, index, generation, key):
+        super(_ValidateParam, self).__init__()
+        self.cmd, self.param, self.value = cmd, param, value
+        self.index, self.generation, self.key = index, generation, key
+        self.signals = _ValidateSignals()
+
+    def run(self):
+        error = check_value(self.cmd, self.param, self.value)
+        self.signals.done.emit(self.index, self.generation, self.key, error)
+
+
+class FieldValidator(QtCore.QObject):
+    """checks the fields of a `CommandLayout` while the user types
+
+    `delay` ms after the last change of a field its value goes through
+    `check_value`, thus `ParamType.convert` of the option type (custom
+    types included), on a thread pool; a slow `convert`, like a
+    `click.Path` on a network drive, never blocks the form. Results are
+    cached per parameter and value, except for types looking at files
+    which may appear any time; results of values changed since are
+    dropped. Invalid fields get a red border and the message as tooltip,
+    `errors` maps their names to the messages.
+    """
+    changed = QtCore.pyqtSignal()
+
+    invalid_style = "border: 1px solid #e74c3c;"
+    _cache = collections.OrderedDict()
+    _cache_size = 4096
+
+    def __init__(self, layout, delay=250, recheck=2000):
+        super(FieldValidator, self).__init__(layout)
+        self.layout = layout
+        self.errors = {}
+        self._tooltips = {}
+        self._generation = [0] * len(layout.widgets)
+        self._dirty = set()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.validate)
+        # a missing file may show up, its field is checked again
+        self.recheck = QtCore.QTimer(self)
+        self.recheck.setSingleShot(True)
+        self.recheck.setInterval(recheck)
+        self.recheck.timeout.connect(self.recheck_files)
+        for index, (param, widgets) in enumerate(
+                zip(layout.func.params, layout.widgets)):
+            if getattr(param, "is_flag", False) or getattr(param, "count",
+                                                           False):
+                # a check box or a spin box can not be wrong
+                continue
+            for w in widgets:
+                for signal in widget_changed_signals(w):
+                    signal.connect(partial(self.field_changed, index))
+            self._dirty.add(index)
+        if self._dirty:
+            self.timer.start()
+
+    def field_changed(self, index, *args):
+        self._dirty.add(index)
+        self.timer.start()
+
+    @QtCore.pyqtSlot()
+    def validate(self):
+        """check the fields changed since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        for index in sorted(dirty):
+            param = self.layout.func.params[index]
+            tokens = self.layout.params_func[index]()
+            self._generation[index] += 1
+            value = param_input(param, tokens)
+            if value is None:
+                self.set_error(index, "Missing parameter: {}".format(
+                    param.name) if param.required else None)
+                continue
+            key = (param, tuple(tokens))
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.set_error(index, self._cache[key])
+                continue
+            job = _ValidateParam(self.layout.func, param, value, index,
+                                 self._generation[index], key)
+            job.signals.done.connect(self._validated)
+            QtCore.QThreadPool.globalInstance().start(job)
+
+    @QtCore.pyqtSlot(int, int, object, object)
+    def _validated(self, index, generation, key, error):
+        if not touches_files(key[0]):
+            self._cache[key] = error
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        if generation == self._generation[index]:
+            self.set_error(index, error)
+
+    @QtCore.pyqtSlot()
+    def recheck_files(self):
+        params = self.layout.func.params
+        for index, param in enumerate(params):
+            if param.name in self.errors and touches_files(param):
+                self._dirty.add(index)
+        if self._dirty:
+            self.validate()
+
+    def set_error(self, index, error):
+        param = self.layout.func.params[index]
+        name = param.name
+        if error is not None and touches_files(param):
+            self.recheck.start()
+        if self.errors.get(name) == error:
+            return
+        if error is None:
+            del self.errors[name]
+        else:
+            self.errors[name] = error
+        for pos, w in enumerate(self.layout.widgets[index]):
+            if not isinstance(w, QtWidgets.QWidget) or \
+                    not widget_changed_signals(w):
+                continue
+            tip = self._tooltips.setdefault((index, pos), w.toolTip())
+            w.setStyleSheet(self.invalid_style if error else "")
+            w.setToolTip(error or tip)
+        self.changed.emit()
+
+
+class CommandLayout(QtWidgets.QGridLayout):
+    # the fields of this command became valid or invalid
+    validityChanged = QtCore.pyqtSignal()
+
+    # the root command gets a filter box once its tree has that many options
+    filter_min_params = 10
+
+    def __init__(self, func, run_exit, parent_layout=None):
+        super(CommandLayout, self).__init__()
+        self.parent_layout = parent_layout
+        self.func = func
+        self.run_exit = run_exit
+        # set by the App: tabs of the sub commands, slot of the Run button
+        self.tabs = None
+        self.tab_commands = []
+        self.run_slot = None
+        self.run_button = None
+        if func.help:
+            label = _HelpLabel(func.help)
+            label.setWordWrap(True)
+            self.addWidget(label, 0, 0, 1, 2)
+            frame = _Spliter()
+            self.addWidget(frame, 1, 0, 1, 2)
+        self.filter_text = ""
+        self.filter_box = None
+        if parent_layout is None and \
+                len(search_index(func)[1]) >= self.filter_min_params:
+            self.filter_box = _FilterLineEdit()
+            self.filter_box.setPlaceholderText("filter options")
+            self.filter_box.setClearButtonEnabled(True)
+            self.filter_box.textChanged.connect(self.set_filter)
+            self.addWidget(self.filter_box, self.rowCount(), 0, 1, 2)
+        self._hidden = set()
+        self.param_rows = []
+        self.params_func, self.widgets = self.append_opts(self.func.params)
+        self.validator = FieldValidator(self)
+        self.validator.changed.connect(self.validityChanged)
+
+    def errors(self):
+        """messages of the invalid fields, parent commands included"""
+        errors = {}
+        if hasattr(self.parent_layout, "errors"):
+            errors = self.parent_layout.errors()
+        errors.update(self.validator.errors)
+        return errors
+
+    @QtCore.pyqtSlot(str)
+    def set_filter(self, text):
+        """show only the options matching every word of `text`
+
+        Sub commands get the filter too, tabs without a matching option in
+        their tree are hidden. Rows are hidden, never rebuilt; while `text`
+        grows only the rows still shown are looked at.
+        """
+        text = text.lower()
+        terms = text.split()
+        narrowing = text.startswith(self.filter_text)
+        self.filter_text = text
+        page = self.parentWidget()
+        if page is None or page.isWindow() or page.isHidden():
+            page = None
+        else:
+            # showing a widget of a visible page costs a layout pass, the
+            # page is shown once with all its rows instead
+            page.hide()
+        for index, row_text in enumerate(search_index(self.func)[0]):
+            shown = index not in self._hidden
+            if narrowing and not shown:
+                continue
+            match = text_matches(row_text, terms)
+            if match != shown:
+                self.set_row_visible(index, match)
+        if page is not None:
+            page.show()
+        if self.tabs is None:
+            return
+        for i, cmd in enumerate(self.tab_commands):
+            shown = self.tabs.isTabVisible(i)
+            if not (narrowing and not shown):
+                shown = not terms or any(text_matches(row_text, terms)
+                        for row_text in search_index(cmd)[1])
+                self.tabs.setTabVisible(i, shown)
+            page = self.tabs.widget(i)
+            if shown and page.is_built():
+                page.content.set_filter(text)
+
+    def set_row_visible(self, index, visible):
+        for w in self.widgets[index]:
+            if isinstance(w, QtWidgets.QLayout):
+                items = [w.itemAt(i).widget() for i in range(w.count())]
+            else:
+                items = [w]
+            for item in items:
+                if item is not None:
+                    item.setVisible(visible)
+        self.setRowStretch(self.param_rows[index], 5 if visible else 0)
+        if visible:
+            self._hidden.discard(index)
+        else:
+            self._hidden.add(index)
+
+    def value_funcs(self, values=None):
+        """`params_func`, the parameters in `values` give their value there
+
+        `values` maps names to values written like `param_value` does.
+        """
+        if not values:
+            return self.params_func
+        return [partial(_sweep.tokens, param, values[param.name])
+                if param.name in values else value_func
+                for param, value_func in zip(self.func.params,
+                                             self.params_func)]
+
+    def generate_argv(self, values=None):
+        """argument list of this command, parent commands included"""
+        argv = []
+        if hasattr(self.parent_layout, "generate_argv"):
+            argv = self.parent_layout.generate_argv()
+        return argv + generate_sysargv(
+            [(self.func.name, self.value_funcs(values))]
+        )
+
+    def command_path(self):
+        """names from the root command down to this one"""
+        path = []
+        if hasattr(self.parent_layout, "command_path"):
+            path = self.parent_layout.command_path()
+        return path + [self.func.name]
+
+    def generate_params(self, values=None):
+        """`(name, value)` of the parameters, parent commands included"""
+        params = []
+        if hasattr(self.parent_layout, "generate_params"):
+            params = self.parent_layout.generate_params()
+        for param, value_func in zip(self.func.params,
+                                     self.value_funcs(values)):
+            params.append((param.name, param_value(param, value_func())))
+        return params
+
+    def form_state(self, values=None):
+        values = values or {}
+        return {param.name: [value_widget_state(w, values[param.name])
+                             if param.name in values else widget_state(w)
+                             for w in widgets]
+                for param, widgets in zip(self.func.params, self.widgets)}
+
+    def set_form_state(self, state):
+        for param, widgets in zip(self.func.params, self.widgets):
+            for w, value in zip(widgets, state.get(param.name, [])):
+                try:
+                    set_widget_state(w, value)
+                except TypeError:
+                    # saved for another type of the parameter
+                    pass
+
+    def snapshot(self):
+        """plain dict of the field values, sub commands included"""
+        state = {"form": self.form_state()}
+        if self.tabs is not None:
+            state["current"] = self.tabs.currentIndex()
+            state["tabs"] = {}
+            for i in range(self.tabs.count()):
+                sub = self.tabs.widget(i).snapshot()
+                if sub is not None:
+                    state["tabs"][self.tabs.tabText(i)] = sub
+        return state
+
+    def restore(self, state):
+        """inverse of `snapshot`"""
+        self.set_form_state(state["form"])
+        if self.tabs is None:
+            return
+        for i in range(self.tabs.count()):
+            sub = state["tabs"].get(self.tabs.tabText(i))
+            page = self.tabs.widget(i)
+            if sub is None:
+                continue
+            if page.is_built():
+                page.content.restore(sub)
+            else:
+                page.saved = sub
+        self.tabs.setCurrentIndex(state["current"])
+
+    def generate_form(self, values=None):
+        """`[name, form_state]` of each command down to this one"""
+        form = []
+        if hasattr(self.parent_layout, "generate_form"):
+            form = self.parent_layout.generate_form()
+        return form + [[self.func.name, self.form_state(values)]]
+
+    def append_opts(self, opts):
+        params_func = []
+        widgets = []
+        for i, para in enumerate(opts, self.rowCount()):
+            widget, value_func = _to_widget(para)
+            widgets.append(widget)
+            params_func.append(value_func)
+            self.param_rows.append(i)
+            for idx, w in enumerate(widget):
+                if isinstance(w, QtWidgets.QLayout):
+                    self.addLayout(w, i, idx)
+                else:
+                    self.addWidget(w, i, idx)
+            self.setRowStretch(i, 5)
+        return params_func, widgets
+
+    def generate_cmd_button(self, label, cmd_slot, tooltip=""):
+        button = QtWidgets.QPushButton(label)
+        button.setToolTip(tooltip)
+        # every click gets its own argument list
+        button.clicked.connect(
+                lambda checked=False: cmd_slot(self.generate_argv()))
+        return button
+
+    def add_cmd_button(self, label, cmd_slot, pos=None):
+        run_button = self.generate_cmd_button(label, cmd_slot)
+        if pos is None:
+            pos = self.rowCount()+1, 0
+        self.addWidget(
+            run_button, pos[0], pos[1]
+        )
+
+    def add_cmd_buttons(self, args):
+        row = self.rowCount()+1
+        cmd_layout = QtWidgets.QGridLayout()
+        cmd_layout.setHorizontalSpacing(20)
+        buttons = []
+        for col, arg in enumerate(args):
+            button = self.generate_cmd_button(**arg)
+            cmd_layout.addWidget(button, 0, col)
+            buttons.append(button)
+        self.addLayout(cmd_layout, row, 0, 1, 2)
+        return buttons
+
+
+class _LoadSignals(QtCore.QObject):
+    loaded = QtCore.pyqtSignal(object, object)
+    error = QtCore.pyqtSignal(str)
+
+
+class _LoadTarget(QtCore.QRunnable):
+    """import TARGET off the gui thread, emits the command and its schema"""
+    def __init__(self, target):
+        super(_LoadTarget, self).__init__()
+        self.target = target
+        self.signals = _LoadSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            func = _runner.load(self.target)
+            schema = _schema.command_schema(func)
+            _schema.store(self.target, schema)
+        except BaseException as e:
+            self.signals.error.emit(
+                    "can not load {}: {!r}".format(self.target, e))
+            return
+        profiler.record("import", start, time.perf_counter(),
+                        target=self.target)
+        self.signals.loaded.emit(func, schema)
+
+
+class AsyncLoop(QtCore.QObject):
+    """the asyncio event loop of the gui thread
+
+    While tasks are pending a qt timer runs one iteration of the loop every
+    `interval` ms, so the coroutines of any number of runs share the gui
+    thread and one loop.
+    """
+    _instance = None
+
+    def __init__(self, interval=5, parent=None):
+        super(AsyncLoop, self).__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self.tasks = set()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.step)
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    @classmethod
+    def instance(cls):
+        # a QApplication deleted without quitting takes the timer along
+        if cls._instance is None or cls._instance.loop.is_closed() or \
+                sip.isdeleted(cls._instance.timer):
+            cls._instance = cls()
+        return cls._instance
+
+    def submit(self, coro):
+        """schedule `coro`, it runs in a copy of the current context"""
+        task = self.loop.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        if not self.timer.isActive():
+            self.timer.start()
+        return task
+
+    @QtCore.pyqtSlot()
+    def step(self):
+        # run_forever returns after the callbacks ready now, stop included
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        if not self.tasks:
+            self.timer.stop()
+
+    @QtCore.pyqtSlot()
+    def close(self):
+        for task in list(self.tasks):
+            task.cancel()
+        while self.tasks:
+            self.step()
+        self.timer.stop()
+        self.loop.close()
+
+
+class _RunSignals(QtCore.QObject):
+    # QRunnable is no QObject, its signals live here
+    finished = QtCore.pyqtSignal(int)
+    error = QtCore.pyqtSignal(str)
+
+
+class RunCommand(QtCore.QRunnable):
+    def __init__(self, func, run_exit, argv, stream=None):
+        super(RunCommand, self).__init__()
+        self.func = func
+        self.run_exit = run_exit
+        # argv[0] is the program name, like sys.argv
+        self.argv = tuple(argv)
+        # output of this run, used by StreamRouter
+        self.stream = stream
+        self.signals = _RunSignals()
+        self.stop_event = threading.Event()
+        # thread executing the command or task of a coroutine command,
+        # guarded by _lock
+        self._thread = None
+        self._task = None
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """ask the run to stop, from any thread
+
+        `quick.stop_requested()` turns True and `Stopped` is raised in the
+        thread of the run at its next python instruction. The task of a
+        coroutine command is cancelled.
+        """
+        self.stop_event.set()
+        with self._lock:
+            if self._task is not None:
+                self._task.get_loop().call_soon_threadsafe(self._task.cancel)
+            elif self._thread is not None:
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                        ctypes.c_ulong(self._thread), ctypes.py_object(Stopped))
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        token = _job_stream.set(self.stream)
+        stop_token = _job_stop.set(self.stop_event)
+        print(list(self.argv))
+        code = 1
+        deferred = False
+        try:
+            try:
+                with self._lock:
+                    self._thread = threading.get_ident()
+                if self.stop_event.is_set():
+                    raise Stopped()
+                # click's standalone mode exits before a returned coroutine
+                # runs, with run_exit the job exits once the run is done
+                rv = _runner.invoke(self.func, self.argv[1:], self.argv[0])
+                if inspect.isawaitable(rv):
+                    if QtCore.QThread.currentThread() is \
+                            QtCore.QCoreApplication.instance().thread():
+                        # awaited on the loop of the gui, the task keeps the
+                        # output and stop event of this run
+                        with self._lock:
+                            self._task = AsyncLoop.instance().submit(
+                                    self._await(rv))
+                            self._task.add_done_callback(self._task_done)
+                        deferred = True
+                    else:
+                        asyncio.run(rv)
+                code = 0
+            finally:
+                # no Stopped is raised in this thread after this
+                with self._lock:
+                    self._thread = None
+        except Stopped:
+            if self._task is not None:
+                # stopped while the task was handed over, it reports
+                self._task.cancel()
+                deferred = True
+            else:
+                print("[stopped]", file=sys.stderr)
+                code = -1
+        except (click.exceptions.ClickException, click.exceptions.Abort) as e:
+            code = self._click_error(e)
+        except (click.exceptions.Exit, SystemExit) as e:
+            code = _runner.exit_code(e)
+        except Exception as bpe:
+            self.signals.error.emit(repr(bpe))
+        finally:
+            _job_stop.reset(stop_token)
+            _job_stream.reset(token)
+            if not deferred:
+                self.signals.finished.emit(code)
+
+    async def _await(self, awaitable):
+        try:
+            await awaitable
+            return 0
+        except (click.exceptions.ClickException, click.exceptions.Abort) as e:
+            return self._click_error(e)
+        except (click.exceptions.Exit, SystemExit) as e:
+            return _runner.exit_code(e)
+        except Exception as e:
+            self.signals.error.emit(repr(e))
+        return 1
+
+    def _click_error(self, error):
+        """exit code of a click error, printed like click's standalone mode
+        with run_exit, shown by the gui thread otherwise"""
+        if self.run_exit:
+            if isinstance(error, click.exceptions.Abort):
+                print("Aborted!", file=sys.stderr)
+                return 1
+            error.show(file=sys.stderr)
+            return error.exit_code
+        if isinstance(error, click.exceptions.BadParameter):
+            self.signals.error.emit(error.format_message())
+        else:
+            self.signals.error.emit(repr(error))
+        return 1
+
+    def _task_done(self, task):
+        # also called for a task cancelled before it started
+        with self._lock:
+            self._task = None
+        if task.cancelled():
+            print("[stopped]", file=self.stream or sys.stderr)
+            code = -1
+        else:
+            code = task.result()
+        self.signals.finished.emit(code)
+
+
+def child_process(parent):
+    """a QProcess whose python child imports what this process imports"""
+    process = QtCore.QProcess(parent)
+    env = QtCore.QProcessEnvironment.systemEnvironment()
+    for key, value in _runner.child_environment().items():
+        env.insert(key, value)
+    process.setProcessEnvironment(env)
+    return process
+
+
+def terminate_process(process, grace=3000):
+    """terminate `process`, kill it if it is still alive after `grace` ms"""
+    process.terminate()
+    QtCore.QTimer.singleShot(grace, process.kill)
+
+
+class RunProcess(QtCore.QObject):
+    """run the command in a child python process
+
+    The child is started with `argv`, its stdout and stderr
+    are read from non-blocking pipes by the qt event loop and written to
+    `stream` (`sys.stdout` / `sys.stderr` of the gui by default), so the
+    command runs on another core without holding the gil of the gui.
+    """
+    finished = QtCore.pyqtSignal(int)
+
+    def __init__(self, func, argv, stream=None, parent=None):
+        super(RunProcess, self).__init__(parent)
+        self.func = func
+        self.argv = tuple(argv)
+        self.stream = stream
+        self.exit_code = None
+        self.process = child_process(self)
+        self._decoders = {
+            QtCore.QProcess.StandardOutput:
+                codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            QtCore.QProcess.StandardError:
+                codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+        self.process.readyReadStandardOutput.connect(
+                partial(self._read, QtCore.QProcess.StandardOutput))
+        self.process.readyReadStandardError.connect(
+                partial(self._read, QtCore.QProcess.StandardError))
+        self.process.finished.connect(self._finished)
+        self.process.errorOccurred.connect(self._error)
+
+    def run(self):
+        print(list(self.argv), file=self.stream or sys.stdout)
+        self.process.start(sys.executable, [
+            "-m", _runner.__name__, _runner.locate(self.func)
+        ] + list(self.argv))
+
+    def stop(self, grace=3000):
+        """terminate the child, see `terminate_process`"""
+        terminate_process(self.process, grace)
+
+    def _read(self, channel):
+        self.process.setReadChannel(channel)
+        data = bytes(self.process.readAll())
+        stream = sys.stdout if channel == QtCore.QProcess.StandardOutput \
+                else sys.stderr
+        stream = self.stream or stream
+        stream.write(self._decoders[channel].decode(data))
+
+    @QtCore.pyqtSlot(int, QtCore.QProcess.ExitStatus)
+    def _finished(self, code, status):
+        if status == QtCore.QProcess.CrashExit:
+            code = -1
+            (self.stream or sys.stderr).write("[process crashed]\n")
+        else:
+            print("[exit code {}]".format(code), file=self.stream or sys.stdout)
+        self.exit_code = code
+        self.finished.emit(code)
+
+    @QtCore.pyqtSlot(QtCore.QProcess.ProcessError)
+    def _error(self, error):
+        if error == QtCore.QProcess.FailedToStart:
+            (self.stream or sys.stderr).write(
+                    "[failed to start {}]\n".format(sys.executable))
+            self.exit_code = -1
+            self.finished.emit(-1)
+
+
+class WorkerProcess(QtCore.QObject):
+    """a child python process serving runs of one command
+
+    The command is imported once (`python -m quick._runner --serve TARGET`),
+    each `run` sends a json request over stdin and the json frames read
+    back are written to `stream`, see `_runner.serve`.
+    """
+    finished = QtCore.pyqtSignal(int)
+
+    def __init__(self, target, parent=None):
+        super(WorkerProcess, self).__init__(parent)
+        self.target = target
+        self.stream = None
+        self.busy = False
+        self._pending = b""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.process = child_process(self)
+        self.process.readyReadStandardOutput.connect(self._read)
+        self.process.readyReadStandardError.connect(self._read_error)
+        self.process.finished.connect(self._exited)
+        self.process.start(sys.executable,
+                           ["-m", _runner.__name__, "--serve", target])
+
+    def alive(self):
+        return self.process.state() != QtCore.QProcess.NotRunning
+
+    def run(self, argv, stream=None):
+        self.busy = True
+        self.stream = stream
+        print(list(argv), file=self.stream or sys.stdout)
+        request = {"prog_name": argv[0], "args": list(argv[1:])}
+        self.process.write((json.dumps(request) + "\n").encode())
+
+    def _read(self):
+        lines = (self._pending +
+                 bytes(self.process.readAllStandardOutput())).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            frame = json.loads(line)
+            if "out" in frame:
+                (self.stream or sys.stdout).write(frame["out"])
+            elif "err" in frame:
+                (self.stream or sys.stderr).write(frame["err"])
+            elif "exit" in frame:
+                self._done(frame["exit"])
+
+    def _read_error(self):
+        # written around the frames: import errors, c extensions ...
+        data = bytes(self.process.readAllStandardError())
+        (self.stream or sys.stderr).write(self._decoder.decode(data))
+
+    def _done(self, code):
+        print("[exit code {}]".format(code), file=self.stream or sys.stdout)
+        self.busy = False
+        self.stream = None
+        self.finished.emit(code)
+
+    @QtCore.pyqtSlot(int, QtCore.QProcess.ExitStatus)
+    def _exited(self, code, status):
+        if self.busy:
+            (self.stream or sys.stderr).write("[worker exited]\n")
+            self._done(-1 if status == QtCore.QProcess.CrashExit else code or -1)
+
+    def terminate(self, grace=3000):
+        """end the current run with the worker, see `terminate_process`"""
+        terminate_process(self.process, grace)
+
+    def stop(self):
+        if self.alive():
+            # end of input ends the serve loop
+            self.process.closeWriteChannel()
+            if not self.process.waitForFinished(1000):
+                self.process.kill()
+                self.process.waitForFinished(1000)
+
+
+class WorkerPool(QtCore.QObject):
+    """warm `WorkerProcess`es, at most `keep` idle ones per command"""
+    def __init__(self, keep=1, parent=None):
+        super(WorkerPool, self).__init__(parent)
+        self.keep = keep
+        self.workers = []
+        self._idle = collections.defaultdict(list)
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def _start(self, target):
+        worker = WorkerProcess(target, self)
+        self.workers.append(worker)
+        return worker
+
+    def prewarm(self, target):
+        """start a worker for TARGET unless one is idle already"""
+        if not any(w.alive() for w in self._idle[target]):
+            self._idle[target].append(self._start(target))
+
+    def acquire(self, target):
+        idle = self._idle[target]
+        while idle:
+            worker = idle.pop()
+            if worker.alive():
+                return worker
+            self.discard(worker)
+        return self._start(target)
+
+    def release(self, worker):
+        idle = self._idle[worker.target]
+        if worker.alive() and len(idle) < self.keep:
+            idle.append(worker)
+        else:
+            self.discard(worker)
+
+    def discard(self, worker):
+        worker.stop()
+        self.workers.remove(worker)
+        worker.deleteLater()
+
+    @QtCore.pyqtSlot()
+    def shutdown(self):
+        for worker in list(self.workers):
+            self.discard(worker)
+        self._idle.clear()
+
+
+# def normalOutputWritten(t):
+    # """Append text to the QTextEdit."""
+    # Maybe QTextEdit.append() works as well, but this is how I do it:
+    # cursor = text.textCursor()
+    # cursor.movePosition(QtGui.QTextCursor.End)
+    # cursor.insertText(t)
+    # text.setTextCursor(cursor)
+    # text.ensureCursorVisible()
+
+class Job(QtCore.QObject):
+    """one run of a command, scheduled by `JobQueue`"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    STOPPED = "stopped"
+
+    stateChanged = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal()
+    error = QtCore.pyqtSignal(str)
+
+    _ids = itertools.count(1)
+
+    def __init__(self, func, argv, run_exit=False, new_thread=False,
+            new_process=False, timeout=None, parent=None):
+        super(Job, self).__init__(parent)
+        self.id = next(Job._ids)
+        self.func = func
+        self.argv = tuple(argv)
+        self.run_exit = run_exit
+        self.new_thread = new_thread
+        self.new_process = new_process
+        self.timeout = timeout
+        self.state = Job.QUEUED
+        self.start_time = self.end_time = None
+        self.exit_code = None
+        self.stop_requested = False
+        self._runner = self._timer = None
+        self._queued = time.perf_counter()
+        # per job output, set by the App when it shows the output
+        self.stream = None
+        # JobBatch of the job, set by JobQueue.submit
+        self.batch = None
+
+    def duration(self):
+        if self.start_time is None:
+            return None
+        return (self.end_time or time.time()) - self.start_time
+
+    def set_state(self, state):
+        self.state = state
+        self.stateChanged.emit()
+
+    def start(self, threadpool, workers=None):
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        profiler.record("run.queued", self._queued, self._started, cat="run",
+                        job=self.id)
+        self.set_state(Job.RUNNING)
+        if self.new_process:
+            try:
+                target = _runner.locate(self.func)
+            except LookupError as e:
+                # a child process could not import the command
+                self.error.emit("can not run {} in a process: {}".format(
+                    self.func.name, e))
+                self._finish(-1)
+                return
+        if self.new_process == "worker":
+            self._workers = workers or WorkerPool(parent=self)
+            self._worker = self._workers.acquire(target)
+            self._worker.finished.connect(self._worker_finished)
+            self._start_timer()
+            self._worker.run(self.argv, stream=self.stream)
+        elif self.new_process:
+            self._runner = RunProcess(self.func, self.argv,
+                                      stream=self.stream, parent=self)
+            self._runner.finished.connect(self._finish)
+            self._start_timer()
+            self._runner.run()
+        else:
+            self._runner = runner = RunCommand(self.func, self.run_exit,
+                                               self.argv, stream=self.stream)
+            self.signals = runner.signals
+            runner.signals.error.connect(self.error)
+            runner.signals.finished.connect(self._finish)
+            self._start_timer()
+            if self.new_thread:
+                threadpool.start(runner)
+            else:
+                runner.run()
+
+    def _start_timer(self):
+        if not self.timeout:
+            return
+        if self.new_process:
+            self._timer = QtCore.QTimer(self)
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._timed_out)
+            self._timer.start(int(self.timeout * 1000))
+        else:
+            # an inline run blocks the qt event loop, a qt timer would wait
+            self._timer = threading.Timer(self.timeout, self._timed_out)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_out(self):
+        # on the timer thread for runs in this process
+        print("[timed out after {}s]".format(self.timeout),
+              file=self.stream or sys.stderr)
+        self.stop()
+
+    def stop(self):
+        """cancel the job if it is queued, interrupt it if it is running
+
+        Runs in this process are interrupted with `Stopped`, child
+        processes are terminated and killed after a grace period.
+        """
+        if self.state == Job.QUEUED:
+            return self.cancel()
+        if self.state != Job.RUNNING:
+            return
+        self.stop_requested = True
+        if isinstance(self._runner, RunCommand):
+            self._runner.stop()
+        elif self.new_process == "worker":
+            self._worker.terminate()
+        elif self._runner is not None:
+            self._runner.stop()
+
+    def cancel(self):
+        if self.state == Job.QUEUED:
+            self.set_state(Job.CANCELLED)
+            self.finished.emit()
+
+    @QtCore.pyqtSlot(int)
+    def _worker_finished(self, code):
+        self._worker.finished.disconnect(self._worker_finished)
+        self._workers.release(self._worker)
+        self._worker = None
+        self._finish(code)
+
+    @QtCore.pyqtSlot(int)
+    def _finish(self, code):
+        if isinstance(self._timer, threading.Timer):
+            self._timer.cancel()
+        elif self._timer is not None:
+            self._timer.stop()
+        self._timer = None
+        self.end_time = time.time()
+        self.exit_code = code
+        profiler.record("run", self._started, time.perf_counter(), cat="run",
+                        job=self.id, argv=" ".join(self.argv), exit_code=code,
+                        mode="worker" if self.new_process == "worker" else
+                             "process" if self.new_process else
+                             "thread" if self.new_thread else "inline")
+        # -1: interrupted by Stopped, cancelled or terminated; a run that
+        # returned before the stop request landed keeps its own outcome
+        if self.stop_requested and code == -1:
+            self.set_state(Job.STOPPED)
+        else:
+            self.set_state(Job.DONE if code == 0 else Job.FAILED)
+        self.finished.emit()
+        if self.run_exit:
+            # on the gui thread, a SystemExit of a pool thread would hang
+            sys.exit(code)
+
+
+class JobBatch(object):
+    """jobs submitted together, at most `max_jobs` of them run at a time
+
+    The limit of the queue still applies. Jobs the batch has no room for
+    wait in `parked` until one of its jobs finishes.
+    """
+    def __init__(self, max_jobs):
+        self.max_jobs = max(1, max_jobs)
+        self.running = 0
+        self.parked = collections.deque()
+
+
+class JobQueue(QtCore.QObject):
+    """runs submitted jobs in order, at most `max_jobs` at a time"""
+    jobAdded = QtCore.pyqtSignal(object)
+
+    def __init__(self, max_jobs=None, workers=1, parent=None):
+        super(JobQueue, self).__init__(parent)
+        self.jobs = []
+        self._pending = collections.deque()
+        self._running = set()
+        self.threadpool = QtCore.QThreadPool(self)
+        self.workers = WorkerPool(workers, parent=self)
+        self.set_max_jobs(max_jobs or QtCore.QThread.idealThreadCount())
+
+    @QtCore.pyqtSlot(int)
+    def set_max_jobs(self, max_jobs):
+        self.max_jobs = max(1, max_jobs)
+        self.threadpool.setMaxThreadCount(self.max_jobs)
+        self._dispatch()
+
+    def submit(self, job, batch=None):
+        job.setParent(self)
+        job.batch = batch
+        self.jobs.append(job)
+        self._pending.append(job)
+        job.finished.connect(partial(self._job_finished, job))
+        self.jobAdded.emit(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        if job.state == Job.QUEUED:
+            if job.batch is not None and job in job.batch.parked:
+                job.batch.parked.remove(job)
+            else:
+                self._pending.remove(job)
+            job.cancel()
+
+    def stop(self, job):
+        if job.state == Job.QUEUED:
+            self.cancel(job)
+        else:
+            job.stop()
+
+    def running(self):
+        return list(self._running)
+
+    def _dispatch(self):
+        while self._pending and len(self._running) < self.max_jobs:
+            job = self._pending.popleft()
+            batch = job.batch
+            if batch is not None:
+                if batch.running >= batch.max_jobs:
+                    # each job is parked once, dispatching stays linear
+                    batch.parked.append(job)
+                    continue
+                batch.running += 1
+            self._running.add(job)
+            job.start(self.threadpool, self.workers)
+
+    def _job_finished(self, job):
+        if job not in self._running:
+            # cancelled while queued
+            return
+        self._running.discard(job)
+        batch = job.batch
+        if batch is not None:
+            batch.running -= 1
+            if batch.parked:
+                # it was queued before everything pending now
+                self._pending.appendleft(batch.parked.popleft())
+        self._dispatch()
+
+
+class JobTableModel(QtCore.QAbstractTableModel):
+    _columns = ["#", "command", "state", "started", "duration", "exit code"]
+
+    def __init__(self, queue, parent=None):
+        super(JobTableModel, self).__init__(parent)
+        self.queue = queue
+        self.jobs = []
+        queue.jobAdded.connect(self.add_job)
+        # refresh the duration of running jobs
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.update_running)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and \
+                orientation == QtCore.Qt.Horizontal:
+            return self._columns[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        job = self.jobs[index.row()]
+        col = index.column()
+        if col == 0:
+            return job.id
+        elif col == 1:
+            return " ".join(job.argv)
+        elif col == 2:
+            return job.state
+        elif col == 3 and job.start_time is not None:
+            return time.strftime("%H:%M:%S", time.localtime(job.start_time))
+        elif col == 4 and job.start_time is not None:
+            return "{:.1f}s".format(job.duration())
+        elif col == 5 and job.exit_code is not None:
+            return job.exit_code
+        return None
+
+    @QtCore.pyqtSlot(object)
+    def add_job(self, job):
+        row = len(self.jobs)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.jobs.append(job)
+        self.endInsertRows()
+        job.stateChanged.connect(partial(self.update_row, row))
+
+    def update_row(self, row):
+        self.dataChanged.emit(self.index(row, 0),
+                              self.index(row, len(self._columns)-1))
+        if self.queue.running():
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def update_running(self):
+        for job in self.queue.running():
+            row = self.jobs.index(job)
+            self.dataChanged.emit(self.index(row, 4), self.index(row, 4))
+
+
+class JobPanel(QtWidgets.QWidget):
+    jobActivated = QtCore.pyqtSignal(object)
+
+    def __init__(self, queue, parent=None):
+        super(JobPanel, self).__init__(parent)
+        self.setWindowTitle("Jobs")
+        self.queue = queue
+        self.model = JobTableModel(queue, self)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.doubleClicked.connect(
+            lambda index: self.jobActivated.emit(self.model.jobs[index.row()]))
+
+        self.max_jobs = QtWidgets.QSpinBox()
+        self.max_jobs.setRange(1, 1024)
+        self.max_jobs.setValue(queue.max_jobs)
+        self.max_jobs.valueChanged.connect(queue.set_max_jobs)
+        cancel = QtWidgets.QPushButton("&Cancel")
+        cancel.setToolTip("cancel the selected queued jobs")
+        cancel.clicked.connect(self.cancel_selected)
+        stop = QtWidgets.QPushButton("&Stop")
+        stop.setToolTip("stop the selected running jobs")
+        stop.clicked.connect(self.stop_selected)
+
+        layout = QtWidgets.QGridLayout()
+        layout.addWidget(self.view, 0, 0, 1, 4)
+        layout.addWidget(QtWidgets.QLabel("max concurrent jobs"), 1, 0)
+        layout.addWidget(self.max_jobs, 1, 1)
+        layout.addWidget(cancel, 1, 2)
+        layout.addWidget(stop, 1, 3)
+        self.setLayout(layout)
+
+    def selected_jobs(self):
+        return [self.model.jobs[index.row()]
+                for index in self.view.selectionModel().selectedRows()]
+
+    @QtCore.pyqtSlot()
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            self.queue.cancel(job)
+
+    @QtCore.pyqtSlot()
+    def stop_selected(self):
+        for job in self.selected_jobs():
+            self.queue.stop(job)
+
+
+class HistoryTableModel(QtCore.QAbstractTableModel):
+    _columns = ["started", "command", "arguments", "duration", "exit code"]
+
+    def __init__(self, parent=None):
+        super(HistoryTableModel, self).__init__(parent)
+        self.runs = []
+
+    def set_runs(self, runs):
+        self.beginResetModel()
+        self.runs = runs
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.runs)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and \
+                orientation == QtCore.Qt.Horizontal:
+            return self._columns[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        run = self.runs[index.row()]
+        col = index.column()
+        if col == 0:
+            return time.strftime("%Y-%m-%d %H:%M:%S",
+                                 time.localtime(run["started"]))
+        elif col == 1:
+            return run["command"]
+        elif col == 2:
+            # group options sit between the names, show all but the program
+            return shlex.join(run["argv"][1:])
+        elif col == 3 and run["duration"] is not None:
+            return "{:.1f}s".format(run["duration"])
+        elif col == 4 and run["exit_code"] is not None:
+            return run["exit_code"]
+        return None
+
+
+class HistoryPanel(QtWidgets.QWidget):
+    """search the run history, refill the form or rerun a past run"""
+    fillRequested = QtCore.pyqtSignal(object)
+    rerunRequested = QtCore.pyqtSignal(object)
+
+    def __init__(self, history, parent=None):
+        super(HistoryPanel, self).__init__(parent)
+        self.setWindowTitle("History")
+        self.history = history
+        self.command = None
+        self.query = QtWidgets.QLineEdit()
+        self.query.setPlaceholderText("name=value or any text")
+        self.query.setClearButtonEnabled(True)
+        # search once typing pauses
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(150)
+        self.timer.timeout.connect(self.search)
+        self.query.textChanged.connect(self.timer.start)
+
+        self.model = HistoryTableModel(self)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.doubleClicked.connect(
+            lambda index: self.fillRequested.emit(self.model.runs[index.row()]))
+
+        fill = QtWidgets.QPushButton("&Fill form")
+        fill.setToolTip("fill the form with the selected run")
+        fill.clicked.connect(partial(self.emit_selected, self.fillRequested))
+        rerun = QtWidgets.QPushButton("&Rerun")
+        rerun.setToolTip("fill the form and run the selected run again")
+        rerun.clicked.connect(partial(self.emit_selected, self.rerunRequested))
+
+        layout = QtWidgets.QGridLayout()
+        layout.addWidget(self.query, 0, 0, 1, 2)
+        layout.addWidget(self.view, 1, 0, 1, 2)
+        layout.addWidget(fill, 2, 0)
+        layout.addWidget(rerun, 2, 1)
+        self.setLayout(layout)
+
+    def show_command(self, command=None):
+        """show the runs of `command` (a command path), all runs for None"""
+        self.command = command
+        self.setWindowTitle("History - " + command if command else "History")
+        self.search()
+        self.show()
+        self.raise_()
+
+    @QtCore.pyqtSlot()
+    def search(self):
+        self.model.set_runs(
+                self.history.search(self.query.text(), command=self.command))
+
+    def emit_selected(self, signal, checked=False):
+        for index in self.view.selectionModel().selectedRows():
+            signal.emit(self.model.runs[index.row()])
+
+
+class SweepPanel(QtWidgets.QWidget):
+    """run a command once per combination of lists or ranges of values
+
+    Every field takes the syntax of `quick._sweep`, empty fields keep the
+    value of the form.
+    """
+    # list of `{name: value}`, max concurrent jobs
+    sweepRequested = QtCore.pyqtSignal(object, int)
+    max_runs = 10000
+
+    def __init__(self, command_layout, max_jobs, parent=None):
+        super(SweepPanel, self).__init__(parent)
+        self.setWindowTitle("Sweep - " + " ".join(command_layout.command_path()))
+        self.command_layout = command_layout
+        self.fields = []
+        layout = QtWidgets.QGridLayout()
+        for row, (param, value_func) in enumerate(
+                zip(command_layout.func.params, command_layout.params_func)):
+            field = QtWidgets.QLineEdit()
+            field.setPlaceholderText(param_value(param, value_func()))
+            field.setToolTip("a, b, c  or  10..20  or  0..1:0.25  or  * for "
+                             "every choice\nempty: the value of the form")
+            field.textChanged.connect(self.update_count)
+            show_name = getattr(param, "show_name", _missing)
+            layout.addWidget(_OptionLabel(
+                param.name if show_name is _missing else show_name), row, 0)
+            layout.addWidget(field, row, 1)
+            self.fields.append(field)
+        row = len(self.fields)
+        self.max_jobs = QtWidgets.QSpinBox()
+        self.max_jobs.setRange(1, 1024)
+        self.max_jobs.setValue(max_jobs)
+        layout.addWidget(QtWidgets.QLabel("parallel runs"), row, 0)
+        layout.addWidget(self.max_jobs, row, 1)
+        self.status = QtWidgets.QLabel()
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status, row + 1, 0, 1, 2)
+        self.run_button = QtWidgets.QPushButton("&Run sweep")
+        self.run_button.setToolTip("run every combination in child processes")
+        self.run_button.clicked.connect(self.run)
+        layout.addWidget(self.run_button, row + 2, 0, 1, 2)
+        self.setLayout(layout)
+        self.update_count()
+
+    def axes(self):
+        """`(name, values)` of the swept fields, raises ValueError"""
+        axes = []
+        for param, field in zip(self.command_layout.func.params, self.fields):
+            try:
+                values = _sweep.values(param, field.text())
+            except ValueError as e:
+                raise ValueError("{}: {}".format(param.name, e)) from None
+            if values:
+                axes.append((param.name, values))
+        return axes
+
+    @QtCore.pyqtSlot()
+    def update_count(self):
+        try:
+            count = math.prod(len(values) for _, values in self.axes())
+        except ValueError as e:
+            self.status.setText(str(e))
+            self.run_button.setEnabled(False)
+            return
+        self.status.setText("{} runs".format(count) if count <= self.max_runs
+                            else "{} runs, at most {}".format(count,
+                                                             self.max_runs))
+        self.run_button.setEnabled(count <= self.max_runs)
+
+    def check(self, axes):
+        """error messages of the values of `axes` click does not accept"""
+        cmd = self.command_layout.func
+        params = {p.name: p for p in cmd.params}
+        errors = []
+        for name, values in axes:
+            param = params[name]
+            for value in values:
+                error = check_value(cmd, param, param_input(
+                    param, _sweep.tokens(param, value)))
+                if error is not None:
+                    errors.append("{}: {}".format(name, error))
+        return errors
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            axes = self.axes()
+        except ValueError:
+            return
+        errors = self.check(axes)
+        if errors:
+            self.status.setText("\n".join(errors))
+            return
+        self.sweepRequested.emit(_sweep.combinations(axes),
+                                 self.max_jobs.value())
+
+
+class GuiStream(QtCore.QObject):
+    """file-like object which hands written text over to the gui in batches
+
+    `write` only appends to a buffer. The buffer is emitted as one
+    `textWritten` signal at most `max_latency` ms after the first pending
+    write, or as soon as `max_batch` characters are pending, so the number
+    of signals (and relayouts of the output widget) does not depend on how
+    many times the command writes.
+    """
+    textWritten = QtCore.pyqtSignal(str)
+    progressAdded = QtCore.pyqtSignal(object)
+    _flushRequested = QtCore.pyqtSignal(int)
+
+    def __init__(self, max_latency=50, max_batch=1 << 16, parent=None):
+        super(GuiStream, self).__init__(parent)
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._size = 0
+        # delay of the flush already requested, None if nothing is pending
+        self._scheduled = None
+        self._gui_thread = threading.get_ident()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush_buffer)
+        self._flushRequested.connect(self._schedule_flush)
+
+    def write(self, text):
+        _runner.check_text(text)
+        if not text:
+            return 0
+        request = None
+        with self._lock:
+            self._buffer.append(text)
+            self._size += len(text)
+            if self._size >= self.max_batch and self._scheduled != 0:
+                request = 0
+            elif self._scheduled is None:
+                request = self.max_latency
+            if request is not None:
+                self._scheduled = request
+        if request is not None:
+            self._flushRequested.emit(request)
+        return len(text)
+
+    def add_progress(self, label="", length=None):
+        """a `ProgressState` shown above the output of this stream"""
+        state = ProgressState(label, length)
+        self.progressAdded.emit(state)
+        return state
+
+    def flush(self):
+        if threading.get_ident() == self._gui_thread:
+            self._timer.stop()
+            self._flush_buffer()
+        else:
+            # let the gui thread flush, this keeps the output in order
+            with self._lock:
+                if self._scheduled in (None, 0):
+                    return
+                self._scheduled = 0
+            self._flushRequested.emit(0)
+
+    @QtCore.pyqtSlot(int)
+    def _schedule_flush(self, delay):
+        if delay == 0:
+            self._timer.stop()
+            self._flush_buffer()
+        elif not self._timer.isActive():
+            self._timer.start(delay)
+
+    @QtCore.pyqtSlot()
+    def _flush_buffer(self):
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._size = 0
+            self._scheduled = None
+        if text:
+            self.textWritten.emit(text)
+
+
+class ProgressState(object):
+    """latest position of a progress bar
+
+    Written by the run at any rate, read by the gui at a fixed one.
+    """
+    __slots__ = ["label", "pos", "length", "done"]
+
+    def __init__(self, label="", length=None):
+        self.label = label
+        self.pos = 0
+        self.length = length
+        self.done = False
+
+
+class GProgressBar(_termui_impl.ProgressBar):
+    """`click.progressbar` of a run with gui output, see `install_progressbar`
+
+    Each update only stores the position in a `ProgressState`, which the
+    output pane draws as a QProgressBar. Outside of such a run it is the
+    progress bar of click.
+    """
+    def __init__(self, *args, **kwargs):
+        super(GProgressBar, self).__init__(*args, **kwargs)
+        stream = _job_stream.get()
+        self.state = None
+        if isinstance(stream, GuiStream) and not getattr(self, "hidden", False):
+            self.state = stream.add_progress(self.label, self.length)
+            # updated like on a terminal, click skips that for other files
+            self._is_atty = True
+            self.is_hidden = False
+
+    def render_progress(self):
+        if self.state is None:
+            return super(GProgressBar, self).render_progress()
+        self.state.pos = self.pos
+        self.state.length = self.length
+
+    def render_finish(self):
+        if self.state is None:
+            return super(GProgressBar, self).render_finish()
+        # steps below update_min_steps are still pending
+        pending = getattr(self, "_completed_intervals", 0)
+        if pending:
+            self.make_step(pending)
+            self._completed_intervals = 0
+        self.state.pos = self.pos
+        self.state.done = True
+
+
+def install_progressbar():
+    """draw `click.progressbar` of runs in the gui
+
+    click creates its bars from `click._termui_impl.ProgressBar`, which is
+    replaced by `GProgressBar`.
+    """
+    if not issubclass(_termui_impl.ProgressBar, GProgressBar):
+        _termui_impl.ProgressBar = GProgressBar
+
+
+def _remove_log(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class StreamRouter(object):
+    """`sys.stdout` replacement writing to the stream of the current job
+
+    Runs set their stream in the `_job_stream` context variable, so output
+    of concurrent jobs ends up in their own panes. Everything else goes to
+    `default`.
+    """
+    encoding = "utf-8"
+
+    def __init__(self, default):
+        self.default = default
+
+    def current(self):
+        return _job_stream.get() or self.default
+
+    def write(self, text):
+        return self.current().write(text)
+
+    def flush(self):
+        self.current().flush()
+
+    def isatty(self):
+        return False
+
+
+class OutputTabs(QtWidgets.QTabWidget):
+    """output window with one pane per job and one for everything else
+
+    The stream of a job is a cheap `GuiStream`, its `OutputPane` is
+    only created once the job prints something. At most `max_panes` job
+    panes are kept, the ones of the jobs finished first make room.
+    """
+    max_panes = 32
+
+    def __init__(self, latency=50, batch=1 << 16, max_lines=10000,
+            max_chars=1 << 22, parent=None):
+        super(OutputTabs, self).__init__(parent)
+        self.setWindowTitle("Output")
+        self.setTabsClosable(True)
+        self.setElideMode(QtCore.Qt.ElideRight)
+        self.tabCloseRequested.connect(self.close_pane)
+        self.latency, self.batch = latency, batch
+        self.max_lines, self.max_chars = max_lines, max_chars
+        self.panes = {}
+        # streams of finished jobs with a pane, oldest first
+        self._finished = collections.OrderedDict()
+        self.default = self.add_stream("output")
+        # progress bars are redrawn at this rate, however often runs tick
+        self.progress_timer = QtCore.QTimer(self)
+        self.progress_timer.setInterval(100)
+        self.progress_timer.timeout.connect(self.update_progress)
+
+    def add_stream(self, label):
+        stream = GuiStream(max_latency=self.latency, max_batch=self.batch,
+                           parent=self)
+        stream.textWritten.connect(partial(self.print, stream, label))
+        stream.progressAdded.connect(partial(self.add_progress, stream, label))
+        return stream
+
+    def pane(self, stream, label=""):
+        pane = self.panes.get(stream)
+        if pane is None:
+            while self._finished and len(self.panes) - (
+                    self.default in self.panes) >= self.max_panes:
+                old = next(iter(self._finished))
+                self.close_pane(self.indexOf(self.panes[old]))
+            pane = OutputPane(max_lines=self.max_lines,
+                              max_chars=self.max_chars)
+            self.panes[stream] = pane
+            self.addTab(pane, label)
+        return pane
+
+    def print(self, stream, label, text):
+        self.pane(stream, label).print(text)
+        self.show()
+
+    def add_progress(self, stream, label, state):
+        self.pane(stream, label).add_progress(state)
+        self.progress_timer.start()
+        self.show()
+
+    @QtCore.pyqtSlot()
+    def update_progress(self):
+        active = False
+        for pane in self.panes.values():
+            active = pane.update_progress() or active
+        if not active:
+            self.progress_timer.stop()
+
+    def show_stream(self, stream):
+        pane = self.panes.get(stream)
+        if pane is not None:
+            self.setCurrentWidget(pane)
+            self.show()
+            self.raise_()
+
+    def finish_stream(self, stream):
+        """the job of `stream` is done, its pane may make room for others
+
+        The stream is deleted together with its pane, at once if it has none.
+        """
+        stream.flush()
+        pane = self.panes.get(stream)
+        if pane is not None:
+            pane.edit.close_log()
+            self._finished[stream] = None
+        else:
+            stream.deleteLater()
+
+    @QtCore.pyqtSlot(int)
+    def close_pane(self, index):
+        pane = self.widget(index)
+        for stream, p in list(self.panes.items()):
+            if p is pane and stream is not self.default:
+                del self.panes[stream]
+                if stream in self._finished:
+                    del self._finished[stream]
+                    stream.deleteLater()
+                self.removeTab(index)
+                pane.deleteLater()
+
+
+class OutputPane(QtWidgets.QWidget):
+    """progress bars of a run above its `OutputEdit`"""
+    max_bars = 8
+
+    def __init__(self, parent=None, **edit_args):
+        super(OutputPane, self).__init__(parent)
+        self.edit = OutputEdit(**edit_args)
+        self.edit.setReadOnly(True)
+        self.bars = []
+        self.bar_layout = QtWidgets.QVBoxLayout()
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(self.bar_layout)
+        layout.addWidget(self.edit)
+        self.setLayout(layout)
+
+    def print(self, text):
+        self.edit.print(text)
+
+    def add_progress(self, state):
+        bar = QtWidgets.QProgressBar()
+        bar.setTextVisible(True)
+        # [state, bar, what the bar shows]
+        self.bars.append([state, bar, None])
+        self.bar_layout.addWidget(bar)
+        # the oldest finished bars make room
+        for old in [b for b in self.bars if b[0].done][:-self.max_bars]:
+            self.bars.remove(old)
+            old[1].deleteLater()
+        self.update_progress()
+
+    def update_progress(self):
+        """redraw bars whose state changed, True while one is running"""
+        active = False
+        for entry in self.bars:
+            state, bar, shown = entry
+            now = (state.pos, state.length, state.done)
+            active = active or not state.done
+            if now == shown:
+                continue
+            entry[2] = now
+            label = state.label + " " if state.label else ""
+            if state.length:
+                # the range of a QProgressBar is an int
+                bar.setRange(0, 1000)
+                bar.setValue(min(1000, int(1000 * state.pos / state.length)))
+                bar.setFormat("{}{}/{} (%p%)".format(
+                    label, state.pos, state.length))
+            elif state.done:
+                bar.setRange(0, 1)
+                bar.setValue(1)
+                bar.setFormat("{}{}".format(label, state.pos))
+            else:
+                # busy indicator
+                bar.setRange(0, 0)
+                bar.setFormat("{}{}".format(label, state.pos))
+        return active
+
+
+class OutputEdit(QtWidgets.QTextEdit):
+    """output pane keeping only the tail of the output in memory
+
+    The document is cut to the last `max_lines` lines and `max_chars`
+    characters. Everything printed is appended to a log file: `log_path`
+    if given, else a temporary one started when the document first drops
+    text. The full output can then be browsed page by page with "View full
+    log" in the context menu. `close_log` releases the file handle, the
+    next print opens it again.
+    """
+    def __init__(self, parent=None, max_lines=10000, max_chars=1 << 22,
+            log_path=None):
+        super(OutputEdit, self).__init__(parent)
+        # the undo stack would keep every inserted text alive
+        self.setUndoRedoEnabled(False)
+        self.document().setMaximumBlockCount(max_lines)
+        self.max_chars = max_chars
+        self.log_path = log_path
+        self._log = None
+        self.viewer = None
+
+    def open_log(self):
+        if self._log is None:
+            if self.log_path is None:
+                fd, self.log_path = tempfile.mkstemp(
+                        prefix="quick-", suffix=".log")
+                self._log = os.fdopen(fd, "a", encoding="utf-8")
+                weakref.finalize(self, _remove_log, self.log_path)
+            else:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+            weakref.finalize(self, self._log.close)
+        return self._log
+
+    def close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def drops(self, text):
+        """True if printing `text` cuts the start of the document"""
+        document = self.document()
+        max_lines = document.maximumBlockCount()
+        return bool(max_lines and document.blockCount() + text.count("\n")
+                    > max_lines or self.max_chars and
+                    document.characterCount() + len(text) > self.max_chars)
+
+    def print(self, text):
+        if self.log_path is None and self.drops(text):
+            # text is about to be lost, the log starts with all of it
+            self.open_log().write(self.toPlainText())
+        if self.log_path is not None:
+            self.open_log().write(text)
+        cursor = self.textCursor()
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.insertText(text)
+        self.trim()
+        cursor.movePosition(QtGui.QTextCursor.End)
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def trim(self):
+        excess = self.document().characterCount() - self.max_chars
+        if self.max_chars and excess > 0:
+            # drop whole lines from the top
+            cursor = QtGui.QTextCursor(self.document())
+            cursor.setPosition(excess, QtGui.QTextCursor.KeepAnchor)
+            cursor.movePosition(QtGui.QTextCursor.NextBlock,
+                                QtGui.QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        action = menu.addAction("View full log")
+        action.setEnabled(self.log_path is not None)
+        action.triggered.connect(self.show_log)
+        menu.exec_(event.globalPos())
+
+    @QtCore.pyqtSlot()
+    def show_log(self):
+        if self._log is not None:
+            self._log.flush()
+        if self.viewer is None:
+            self.viewer = LogViewer(self.log_path)
+            # a window of its own, styled like the output window
+            self.viewer.setStyleSheet(self.window().styleSheet())
+        self.viewer.refresh()
+        self.viewer.show()
+        self.viewer.raise_()
+
+
+class _LogPager(object):
+    """memory mapped pages of a log file, each cut at a line end"""
+    def __init__(self, path, page_size=1 << 16):
+        self.path = path
+        self.page_size = page_size
+        self._map = None
+        self._starts = [0]
+        self.refresh()
+
+    def refresh(self):
+        """pick up text appended to the file since the last call"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # the last page may have grown, continue from its start
+        start = self._starts[-1]
+        while start + self.page_size < size:
+            end = self._map.find(b"\n", start + self.page_size)
+            if end == -1 or end + 1 >= size:
+                break
+            start = end + 1
+            self._starts.append(start)
+        self.size = size
+
+    def __len__(self):
+        return len(self._starts)
+
+    def page(self, index):
+        if self._map is None:
+            return ""
+        start = self._starts[index]
+        end = self._starts[index+1] if index + 1 < len(self._starts) \
+                else self.size
+        return self._map[start:end].decode("utf-8", errors="replace")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class LogViewer(QtWidgets.QWidget):
+    def __init__(self, path, parent=None):
+        super(LogViewer, self).__init__(parent)
+        self.setWindowTitle(path)
+        self.pager = _LogPager(path)
+        self.index = 0
+
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setUndoRedoEnabled(False)
+        self.label = QtWidgets.QLabel()
+
+        layout = QtWidgets.QGridLayout()
+        layout.addWidget(self.text, 0, 0, 1, 5)
+        for col, (label, step) in enumerate(
+                [("<<", None), ("<", -1), (">", 1), (">>", None)]):
+            button = QtWidgets.QPushButton(label)
+            if step is None:
+                button.clicked.connect(
+                    partial(self.show_page, 0 if label == "<<" else -1))
+            else:
+                button.clicked.connect(partial(self.move, step))
+            layout.addWidget(button, 1, col)
+        layout.addWidget(self.label, 1, 4)
+        self.setLayout(layout)
+
+    def refresh(self):
+        self.pager.refresh()
+        self.show_page(-1)
+
+    def move(self, step):
+        self.show_page(self.index + step)
+
+    def show_page(self, index):
+        if index < 0:
+            index += len(self.pager)
+        self.index = min(max(index, 0), len(self.pager) - 1)
+        self.text.setPlainText(self.pager.page(self.index))
+        self.label.setText("page {} / {}".format(
+            self.index + 1, len(self.pager)))
+
+    def closeEvent(self, event):
+        self.pager.close()
+        super(LogViewer, self).closeEvent(event)
+
+
+class App(QtWidgets.QWidget):
+    def __init__(self, func, run_exit, new_thread, output='gui', left=10, top=10,
+            width=400, height=140, output_latency=50, output_batch=1 << 16,
+            output_lines=10000, output_chars=1 << 22, new_process=False,
+            max_jobs=None, stylesheet=None, history=True, workers=1,
+            timeout=None, max_tabs=None):
+        """
+        Parameters
+        ----------
+        max_tabs : int
+            number of sub command forms kept built, the ones used longest
+            ago are torn down and rebuilt with their values when shown
+            again. None keeps them all
+        history : bool or str
+            sqlite file every run is appended to, True for the one in the
+            user data directory, False to keep no history
+        stylesheet : str
+            stylesheet of this window, set before any widget is created
+        new_process : bool or "worker"
+            run commands in a child python process, see `RunProcess`.
+            "worker" keeps the process, and the imported command, for the
+            next runs, see `WorkerProcess`
+        workers : int
+            idle worker processes kept per command
+        timeout : float
+            seconds after which a run is stopped, `GCommand(timeout=...)`
+            sets it per command
+        max_jobs : int
+            number of runs executed at the same time, the others wait in
+            the job queue. Defaults to the number of cores
+        output : str
+            'gui': [default] redirect screen output to the gui
+            'term': do nothing
+        output_latency : int
+            max delay in ms before written text shows up in the gui
+        output_batch : int
+            number of pending characters which triggers an immediate flush
+        output_lines, output_chars : int
+            scrollback kept in the output pane, older output is only kept
+            in its log file
+        """
+        super().__init__()
+        self.stylesheet = stylesheet
+        if stylesheet is not None:
+            self.setStyleSheet(stylesheet)
+        self.new_thread = new_thread
+        self.new_process = new_process
+        self.timeout = timeout
+        self.title = func.name
+        self.func = func
+        # True: the default file, only created by the first run recorded
+        self.history = History(None if history is True else history) \
+                if history else None
+        self.historyPanel = None
+        self.sweepPanel = None
+        self.tab_cache = TabCache(max_tabs, parent=self)
+        # False while the real command is imported, see `load_target`
+        self.runnable = True
+        self.target = None
+        self.initUI(run_exit, QtCore.QRect(left, top, width, height))
+        self.jobs = JobQueue(max_jobs, workers, parent=self)
+        self.jobs.jobAdded.connect(self.job_added)
+        self.threadpool = self.jobs.threadpool
+        self.jobPanel = self.style_window(JobPanel(self.jobs))
+        self.outputs = self.initOutput(output, output_latency, output_batch,
+                                       output_lines, output_chars)
+        if self.outputs is not None:
+            self.jobPanel.jobActivated.connect(
+                    lambda job: self.outputs.show_stream(job.stream))
+        self.prewarm()
+
+    def style_window(self, window):
+        """give `window`, a window of its own, the stylesheet of the App"""
+        if self.stylesheet is not None:
+            window.setStyleSheet(self.stylesheet)
+        return window
+
+    def prewarm(self):
+        """start a worker process now, the first run is warm too"""
+        if self.new_process != "worker" or not self.runnable:
+            return
+        try:
+            self.jobs.workers.prewarm(_runner.locate(self.func))
+        except LookupError:
+            # not a module level command, workers can not load it
+            pass
+
+    def initOutput(self, output, latency=50, batch=1 << 16,
+            max_lines=10000, max_chars=1 << 22):
+        if output == 'gui':
+            install_progressbar()
+            tabs = self.style_window(
+                    OutputTabs(latency, batch, max_lines, max_chars))
+            sys.stdout = StreamRouter(tabs.default)
+            sys.stderr = sys.stdout
+            return tabs
+        else:
+            return None
+
+
+    def initCommandUI(self, func, run_exit, parent_layout=None):
+        with profiler.phase("command.build", command=func.name):
+            opt_set = CommandLayout(func, run_exit, parent_layout=parent_layout)
+        if isinstance(func, click.MultiCommand):
+            with profiler.phase("introspect", command=func.name):
+                commands = list(func.commands.items())
+            tabs = _InputTabWidget(cache=self.tab_cache)
+            for cmd, f in commands:
+                # only the current tab is built now, the others on demand
+                tabs.add_lazy_tab(
+                        partial(self.initCommandUI, f, run_exit,
+                                parent_layout=opt_set),
+                        cmd)
+            opt_set.addWidget(
+                    tabs, opt_set.rowCount(), 0, 1, 2
+                    )
+            opt_set.tabs = tabs
+            opt_set.tab_commands = [f for cmd, f in commands]
+            # return opt_set
+        elif isinstance(func, click.Command):
+            new_thread = getattr(func, "new_thread", self.new_thread)
+            if inspect.iscoroutinefunction(func.callback):
+                # awaited on the loop of the gui thread, see `AsyncLoop`
+                new_thread = False
+            new_process = getattr(func, "new_process", None)
+            if new_process is None:
+                new_process = self.new_process
+            timeout = getattr(func, "timeout", None) or self.timeout
+            opt_set.run_slot = partial(self.run_cmd,
+                    new_thread=new_thread, new_process=new_process,
+                    layout=opt_set, timeout=timeout)
+            buttons = [
+                        {
+                            'label':'&Run',
+                            'cmd_slot': opt_set.run_slot,
+                            "tooltip":"run command"
+                            },
+                        {
+                            'label':'&Copy',
+                            'cmd_slot': self.copy_cmd,
+                            "tooltip":"copy command to clipboard"
+                            },
+                        ]
+            buttons.append({
+                        'label':'&Sweep',
+                        'cmd_slot': lambda argv, layout=opt_set:
+                            self.show_sweep(layout),
+                        "tooltip":"run over lists or ranges of values"
+                        })
+            if self.history is not None:
+                buttons.append({
+                            'label':'&History',
+                            'cmd_slot': lambda argv, layout=opt_set:
+                                self.show_history(layout),
+                            "tooltip":"search the previous runs"
+                            })
+            opt_set.run_button = opt_set.add_cmd_buttons(args=buttons)[0]
+            opt_set.run_button.setObjectName("run")
+            self.update_run_button(opt_set)
+        # fields of a group count for the Run buttons of its sub commands
+        opt_set.validityChanged.connect(self.update_run_buttons)
+        if parent_layout is not None and parent_layout.filter_text:
+            # a tab built while the form is filtered
+            opt_set.set_filter(parent_layout.filter_text)
+        return opt_set
+
+    def update_run_button(self, layout):
+        errors = layout.errors()
+        layout.run_button.setEnabled(self.runnable and not errors)
+        if not self.runnable:
+            tooltip = "loading {} ...".format(self.target)
+        elif errors:
+            tooltip = "\n".join("{}: {}".format(name, error)
+                                 for name, error in errors.items())
+        else:
+            tooltip = "run command"
+        layout.run_button.setToolTip(tooltip)
+
+    @QtCore.pyqtSlot()
+    def update_run_buttons(self):
+        for layout in self.findChildren(CommandLayout):
+            if layout.run_button is not None:
+                self.update_run_button(layout)
+
+    def set_runnable(self, runnable):
+        self.runnable = runnable
+        self.update_run_buttons()
+
+    def load_target(self, target):
+        """import TARGET in the background, then run its command
+
+        The form keeps showing the current command (a stand-in built from a
+        cached schema), the Run buttons are disabled until the import is
+        done.
+        """
+        self.target = target
+        self.set_runnable(False)
+        loader = _LoadTarget(target)
+        loader.signals.loaded.connect(self.bind)
+        loader.signals.error.connect(self.show_error)
+        QtCore.QThreadPool.globalInstance().start(loader)
+
+    @QtCore.pyqtSlot(object, object)
+    def bind(self, func, schema=None):
+        """run `func` from now on, the form is rebuilt if its schema changed"""
+        if schema is None:
+            schema = _schema.command_schema(func)
+        if schema != _schema.command_schema(self.func):
+            # what was typed while importing goes over to the new form
+            state = self.opt_set.snapshot()
+            # hand the old layout to a temporary widget, which deletes it
+            QtWidgets.QWidget().setLayout(self.opt_set)
+            self.opt_set = self.initCommandUI(func, self.run_exit)
+            self.setLayout(self.opt_set)
+            self.opt_set.restore(state)
+        self.func = func
+        self.set_runnable(True)
+        self.prewarm()
+
+    def initUI(self, run_exit, geometry):
+        self._shown = time.perf_counter()
+        self.run_exit = run_exit
+        self.setWindowTitle(self.title)
+        # self.setGeometry(self.left, self.top, self.width, self.height)
+        self.setGeometry(geometry)
+        self.opt_set = self.initCommandUI(self.func, run_exit, )
+        self.setLayout(self.opt_set)
+        self.show()
+
+
+    def paintEvent(self, event):
+        if self._shown is not None:
+            profiler.record("first_paint", self._shown, time.perf_counter())
+            self._shown = None
+        super(App, self).paintEvent(event)
+
+    def copy_cmd(self, argv):
+        cb = QtWidgets.QApplication.clipboard()
+        cb.clear(mode=cb.Clipboard )
+        cmd_text = ' '.join(argv)
+        cb.setText(cmd_text, mode=cb.Clipboard)
+
+        msg = QtWidgets.QMessageBox()
+        msg.setIcon(QtWidgets.QMessageBox.Information)
+        msg.setText(f"copy '{cmd_text}' to clipboard")
+        msg.exec_()
+
+    def run_cmd(self, argv, new_thread, new_process=False, layout=None,
+            timeout=None, values=None, batch=None):
+        """submit a run of `argv`
+
+        `values` are the parameters of the command of `layout` that `argv`
+        gives other values than the form, see `CommandLayout.value_funcs`.
+        `batch` is the `JobBatch` the job counts against.
+        """
+        error = self.run_error(layout, values)
+        if error is not None:
+            self.show_error(error)
+            return None
+        job = Job(self.func, argv, self.run_exit, new_thread, new_process,
+                  timeout=timeout)
+        if layout is not None and self.history is not None:
+            # the form is read now, it may change while the job runs
+            job.finished.connect(partial(self.record_run, job,
+                                         " ".join(layout.command_path()),
+                                         layout.generate_params(values),
+                                         layout.generate_form(values)))
+        return self.jobs.submit(job, batch)
+
+    def run_error(self, layout, values=None):
+        """why a run of `layout` can not start now, None if it can"""
+        if not self.runnable:
+            return "{} is still loading".format(self.target)
+        errors = {} if layout is None else layout.errors()
+        for name in values or ():
+            errors.pop(name, None)
+        if errors:
+            return "\n".join("{}: {}".format(name, error)
+                             for name, error in errors.items())
+        return None
+
+    def show_sweep(self, layout):
+        if self.sweepPanel is None or \
+                self.sweepPanel.command_layout is not layout:
+            if self.sweepPanel is not None:
+                self.sweepPanel.deleteLater()
+            self.sweepPanel = self.style_window(
+                    SweepPanel(layout, self.jobs.max_jobs))
+            # the form of a torn down tab is gone
+            layout.destroyed.connect(self.sweepPanel.close)
+            self.sweepPanel.sweepRequested.connect(
+                    partial(self.run_sweep, layout))
+        self.sweepPanel.show()
+        self.sweepPanel.raise_()
+        return self.sweepPanel
+
+    def run_sweep(self, layout, sweep, max_jobs=None):
+        """run the command of `layout` once per `{name: value}` of `sweep`
+
+        The runs are child processes (warm workers if the command uses
+        them), at most `max_jobs` at a time within the limit of the job
+        queue; the job panel lists their exit codes and durations. Commands
+        a child process can not import run in threads.
+        """
+        # checked once, not in a message box per combination
+        error = self.run_error(layout, sweep[0] if sweep else None)
+        if error is not None:
+            self.show_error(error)
+            return []
+        batch = JobBatch(max_jobs or self.jobs.max_jobs)
+        new_process = layout.run_slot.keywords["new_process"]
+        try:
+            _runner.locate(self.func)
+        except LookupError:
+            new_process = False
+        else:
+            new_process = "worker" if new_process == "worker" else True
+        jobs = [layout.run_slot(layout.generate_argv(values), new_thread=True,
+                                new_process=new_process, values=values,
+                                batch=batch)
+                for values in sweep]
+        self.jobPanel.show()
+        return jobs
+
+    def record_run(self, job, command, params, form):
+        if job.state == Job.CANCELLED:
+            return
+        self.history.add(command, job.argv, params, form=form,
+                         started=job.start_time, duration=job.duration(),
+                         exit_code=job.exit_code)
+
+    def show_history(self, layout=None):
+        if self.historyPanel is None:
+            self.historyPanel = self.style_window(HistoryPanel(self.history))
+            self.historyPanel.fillRequested.connect(self.restore_run)
+            self.historyPanel.rerunRequested.connect(self.rerun)
+        self.historyPanel.show_command(
+                " ".join(layout.command_path()) if layout else None)
+        return self.historyPanel
+
+    def restore_form(self, form):
+        """fill the forms along the command path of `form`
+
+        The tabs of the path are selected (and built) on the way, the
+        layout of the last command is returned.
+        """
+        layout = None
+        for name, state in form:
+            if layout is None:
+                layout = self.opt_set
+            else:
+                tabs = layout.tabs
+                names = [tabs.tabText(i) for i in range(tabs.count())] \
+                        if tabs is not None else []
+                if name not in names:
+                    raise LookupError("no command {!r}".format(name))
+                tabs.setCurrentIndex(names.index(name))
+                layout = tabs.widget(names.index(name)).build()
+            layout.set_form_state(state)
+        return layout
+
+    @QtCore.pyqtSlot(object)
+    def restore_run(self, run):
+        try:
+            return self.restore_form(run["form"] or [])
+        except LookupError as e:
+            self.show_error("can not restore the form: {}".format(e))
+
+    @QtCore.pyqtSlot(object)
+    def rerun(self, run):
+        layout = self.restore_run(run)
+        if layout is not None and layout.run_slot is not None:
+            return layout.run_slot(layout.generate_argv())
+
+    @QtCore.pyqtSlot(object)
+    def job_added(self, job):
+        job.error.connect(self.show_error)
+        if self.outputs is not None:
+            job.stream = self.outputs.add_stream(
+                    "#{} {}".format(job.id, " ".join(job.argv[1:])))
+            job.finished.connect(
+                    partial(self.outputs.finish_stream, job.stream))
+        if job.new_thread or job.new_process:
+            self.jobPanel.show()
+
+    @QtCore.pyqtSlot(str)
+    def show_error(self, text):
+        msg = QtWidgets.QMessageBox()
+        msg.setIcon(QtWidgets.QMessageBox.Warning)
+        msg.setText(text)
+        msg.exec_()
+
+
+def gui_it(click_func, style="qdarkstyle", profile=None,
+        style_scope="application", target=None, **argvs)->None:
+    """ 
+    Parameters
+    ----------
+    click_func
+    `new_thread` is used for qt-based func, like matplotlib
+    `profile` dumps the phase timings when the gui is closed, see
+    `quick.profiler.dump`. Defaults to $QUICK_PROFILE
+    `style_scope` is "application" to style every window or "window" to
+    style the windows of the App only, before their widgets are created
+    `target` is imported in the background and replaces `click_func`,
+    see `App.load_target`
+    """
+    global _gstyle
+    profile = profile_target(profile)
+    if profile:
+        profiler.enable()
+    with profiler.phase("qapplication"):
+        app = QtWidgets.QApplication(sys.argv)
+    with profiler.phase("style.load", style=style):
+        _gstyle = GStyle(style)
+    with profiler.phase("style.apply"):
+        if style_scope == "window":
+            # applied by the App before it creates its widgets
+            argvs["stylesheet"] = _gstyle.stylesheet
+        else:
+            _gstyle.apply(app)
+
+    # set the default value for argvs
+    argvs["run_exit"] = argvs.get("run_exit", False)
+    argvs["new_thread"] = argvs.get("new_thread", False)
+
+    with profiler.phase("app.init"):
+        ex = App(click_func, **argvs)
+    if target is not None:
+        ex.load_target(target)
+    code = app.exec_()
+    if profile:
+        profiler.dump(profile)
+    sys.exit(code)
+
+
+def launch(target, **argvs)->None:
+    """see `quick.launch`"""
+    schema = _schema.cached(target)
+    if schema is None:
+        with profiler.phase("import", target=target):
+            func = _runner.load(target)
+        _schema.store(target, _schema.command_schema(func))
+        return gui_it(func, **argvs)
+    gui_it(_schema.schema_command(schema), target=target, **argvs)
@@ -0,0 +1,138 @@
+"""Run history of quick, an append-only sqlite database
+
+Every run is one row of `runs` (command path, argv, form state, start time,
+duration, exit code), its parameter values are rows of `params`. `line` holds
+the arguments joined by spaces, so plain text search sees them as typed. Both are
+only ever inserted into; lookups go through the indexes on the command and
+on (parameter name, value), so they stay fast with a long history.
+"""
+import json
+import shlex
+import sqlite3
+
+from . import _data_path
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,
+    argv TEXT NOT NULL,
+    line TEXT,
+    form TEXT,
+    started REAL NOT NULL,
+    duration REAL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS params (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_command ON runs (command, started);
+CREATE INDEX IF NOT EXISTS runs_by_start ON runs (started);
+CREATE INDEX IF NOT EXISTS params_by_value ON params (name, value);
+"""
+
+
+def _line(argv):
+    return " ".join(argv)
+
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class History(object):
+    def __init__(self, path=None):
+        # None: history.sqlite in the user data directory
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self):
+        # opened on first use, App creation does not touch the disk
+        if self._db is None:
+            if self.path is None:
+                self.path = _data_path("history.sqlite")
+            self._db = sqlite3.connect(self.path)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_schema)
+            self._migrate()
+        return self._db
+
+    def _migrate(self):
+        # histories written before `line` existed searched the argv json
+        columns = [row["name"] for row in
+                   self._db.execute("PRAGMA table_info(runs)")]
+        if "line" in columns:
+            return
+        with self._db:
+            self._db.execute("ALTER TABLE runs ADD COLUMN line TEXT")
+            self._db.executemany(
+                "UPDATE runs SET line = ? WHERE id = ?",
+                [(_line(json.loads(row["argv"])), row["id"]) for row in
+                 self._db.execute("SELECT id, argv FROM runs")])
+
+    def add(self, command, argv, params=(), form=None, started=0.,
+            duration=None, exit_code=None):
+        """append a run, `params` are `(name, value)` pairs"""
+        with self.db:
+            run = self.db.execute(
+                "INSERT INTO runs (command, argv, line, form, started, "
+                "duration, exit_code) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (command, json.dumps(list(argv)), _line(argv),
+                 None if form is None else json.dumps(form),
+                 started, duration, exit_code)).lastrowid
+            self.db.executemany(
+                "INSERT INTO params (run, name, value) VALUES (?, ?, ?)",
+                [(run, name, value) for name, value in params])
+        return run
+
+    def search(self, query="", command=None, limit=200):
+        """runs matching every term of `query`, newest first
+
+        A `name=value` term matches a parameter value exactly, any other
+        term is a substring of the command line. Terms are split like a
+        shell would, so values with spaces can be quoted.
+        """
+        where, args = [], []
+        if command:
+            where.append("command = ?")
+            args.append(command)
+        try:
+            terms = shlex.split(query)
+        except ValueError:
+            terms = query.split()
+        for term in terms:
+            name, sep, value = term.partition("=")
+            if sep and name:
+                where.append("id IN (SELECT run FROM params "
+                             "WHERE name = ? AND value = ?)")
+                args += [name, value]
+            else:
+                where.append("line LIKE ? ESCAPE '\\'")
+                args.append("%" + _like_escape(term) + "%")
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started DESC LIMIT ?"
+        return [self._run(row) for row in self.db.execute(sql, args + [limit])]
+
+    def get(self, run):
+        row = self.db.execute("SELECT * FROM runs WHERE id = ?",
+                              (run,)).fetchone()
+        return None if row is None else self._run(row)
+
+    @staticmethod
+    def _run(row):
+        run = dict(row)
+        run["argv"] = json.loads(run["argv"])
+        run["form"] = None if run["form"] is None else json.loads(run["form"])
+        return run
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
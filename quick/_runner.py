@@ -0,0 +1,277 @@
+"""Run a click command in a child process
+
+    python -m quick._runner TARGET PROG_NAME [ARGS...]
+    python -m quick._runner --serve TARGET
+
+The second form is a warm worker: TARGET is imported once, then every line
+of stdin is a json request `{"prog_name": ..., "args": [...]}` which is
+answered on stdout with json frames, one per line: `{"out": text}` and
+`{"err": text}` while the command runs, `{"exit": code}` when it is done.
+
+TARGET is `module:attr` or `path/to/script.py:attr`. Scripts are run with a
+`__name__` other than "__main__", so their `gui_it(...)` / `cli()` call at
+the bottom is skipped and only the command definitions are executed.
+
+Commands with a coroutine callback (`async def`) are run to completion with
+`asyncio.run`, their click context stays open until the coroutine is done.
+
+Only click is imported here, the child never loads Qt.
+"""
+import asyncio
+import importlib
+import inspect
+import json
+import os
+import runpy
+import sys
+import threading
+import traceback
+import weakref
+
+import click
+
+# commands returned by `load`, they need not be reachable from sys.modules
+_loaded = weakref.WeakKeyDictionary()
+
+
+def locate(func)->str:
+    """return the TARGET string of the module level command `func`"""
+    if func in _loaded:
+        return _loaded[func]
+    candidates = ["__main__"]
+    callback = getattr(func, "callback", None)
+    if callback is not None:
+        candidates.insert(0, callback.__module__)
+    for name in candidates:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        for attr, value in vars(module).items():
+            if value is not func:
+                continue
+            spec = getattr(module, "__spec__", None)
+            if name == "__main__" and spec is None:
+                # started as `python script.py`
+                return "{}:{}".format(os.path.abspath(module.__file__), attr)
+            return "{}:{}".format(spec.name if spec else name, attr)
+    raise LookupError(
+        "command {!r} is not a module level object".format(func.name))
+
+
+def load(target):
+    """inverse of `locate`"""
+    where, _, attr = target.rpartition(":")
+    if where.endswith(".py") or os.path.sep in where:
+        sys.path.insert(0, os.path.dirname(where))
+        namespace = runpy.run_path(where, run_name="__quick__")
+    else:
+        namespace = vars(importlib.import_module(where))
+    func = namespace[attr]
+    _loaded[func] = target
+    return func
+
+
+def child_environment():
+    """environment variables letting the child import what we import"""
+    path = [p or os.getcwd() for p in sys.path]
+    return {
+        "PYTHONPATH": os.pathsep.join(path),
+        "PYTHONUNBUFFERED": "1",
+    }
+
+
+def check_text(text):
+    """raise TypeError unless `text` is a str, like a text file's `write`"""
+    if not isinstance(text, str):
+        # click.echo probes with write(b""), a text stream must refuse
+        raise TypeError("write() argument must be str, not {}".format(
+            type(text).__name__))
+
+
+class _FrameWriter(object):
+    """text file sending what is written as `{name: text}` frames
+
+    Text is sent line by line, a partial line on `flush`.
+    """
+    def __init__(self, send, name):
+        self.send = send
+        self.name = name
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        check_text(text)
+        with self._lock:
+            self._buffer.append(text)
+        if "\n" in text:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer = []
+        if text:
+            self.send({self.name: text})
+
+    def isatty(self):
+        return False
+
+
+def exit_code(e):
+    """the exit code of a `SystemExit` or of click's `Exit`"""
+    if isinstance(e, click.exceptions.Exit):
+        return e.exit_code
+    if e.code is None or isinstance(e.code, int):
+        return e.code or 0
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+class _InContext(object):
+    # awaits `awaitable` with `ctx` pushed while each of its steps runs, so
+    # runs sharing an event loop each see their own current context
+    def __init__(self, ctx, awaitable):
+        self.ctx = ctx
+        self.awaitable = awaitable
+
+    def __await__(self):
+        steps = self.awaitable.__await__()
+        value, error = None, None
+        while True:
+            with self.ctx.scope(cleanup=False):
+                try:
+                    if error is None:
+                        future = steps.send(value)
+                    else:
+                        future = steps.throw(error)
+                except StopIteration as e:
+                    return e.value
+            try:
+                value, error = (yield future), None
+            except BaseException as e:
+                value, error = None, e
+
+
+async def _closing(contexts, awaitable):
+    try:
+        return await _InContext(contexts[-1], awaitable)
+    finally:
+        for ctx in reversed(contexts):
+            ctx.close()
+
+
+def _invoke(ctx, contexts):
+    # `ctx.command.invoke(ctx)`, but the context of the sub command a group
+    # runs is appended to `contexts` instead of being closed on return
+    cmd = ctx.command
+    protected = "_protected_args" if hasattr(ctx, "_protected_args") \
+            else "protected_args"
+    if not isinstance(cmd, click.Group) or cmd.chain or \
+            not getattr(ctx, protected):
+        return cmd.invoke(ctx)
+    args = [*getattr(ctx, protected), *ctx.args]
+    ctx.args = []
+    setattr(ctx, protected, [])
+    with ctx.scope(cleanup=False):
+        name, sub, args = cmd.resolve_command(ctx, args)
+        ctx.invoked_subcommand = name
+        click.Command.invoke(cmd, ctx)
+        sub_ctx = sub.make_context(name, args, parent=ctx)
+    contexts.append(sub_ctx)
+    with sub_ctx.scope(cleanup=False):
+        rv = _invoke(sub_ctx, contexts)
+    if cmd._result_callback is not None:
+        with ctx.scope(cleanup=False):
+            rv = ctx.invoke(cmd._result_callback, rv, **ctx.params)
+    return rv
+
+
+def invoke(func, args, prog_name):
+    """`func.main(args, prog_name, standalone_mode=False)`, keeping the
+    contexts open for a coroutine command
+
+    An awaitable returned by the callback comes back wrapped: it runs with
+    the context of the command current and closes the contexts of the run
+    when it is done, so `click.File` options and `call_on_close` resources
+    stay usable. Unlike `main`, `ctx.exit()` raises click's `Exit`, see
+    `exit_code`.
+    """
+    contexts = [func.make_context(prog_name, list(args))]
+    try:
+        with contexts[0].scope(cleanup=False):
+            rv = _invoke(contexts[0], contexts)
+    except BaseException:
+        for ctx in reversed(contexts):
+            ctx.close()
+        raise
+    if inspect.isawaitable(rv):
+        return _closing(contexts, rv)
+    for ctx in reversed(contexts):
+        ctx.close()
+    return rv
+
+
+def run_main(func, args, prog_name):
+    """run `func` like click's standalone mode, returns the exit code
+
+    A coroutine returned by the command callback is awaited.
+    """
+    try:
+        rv = invoke(func, args, prog_name)
+        if inspect.isawaitable(rv):
+            asyncio.run(rv)
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        print("Aborted!", file=sys.stderr)
+        return 1
+    except (click.exceptions.Exit, SystemExit) as e:
+        return exit_code(e)
+    return 0
+
+
+def serve(target, requests=None, responses=None):
+    """run the command TARGET once per request, see the module doc"""
+    if responses is None:
+        # frames get a private copy of stdout, output written to the file
+        # descriptor directly (c extensions, subprocesses) goes to stderr
+        responses = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin if requests is None else requests
+    lock = threading.Lock()
+
+    def send(frame):
+        line = json.dumps(frame) + "\n"
+        with lock:
+            responses.write(line)
+            responses.flush()
+
+    func = load(target)
+    sys.stdout = _FrameWriter(send, "out")
+    sys.stderr = _FrameWriter(send, "err")
+    for line in requests:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            code = run_main(func, request["args"], request["prog_name"])
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send({"exit": code})
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[0] == "--serve":
+        return serve(argv[1])
+    target, prog_name, args = argv[0], argv[1], argv[2:]
+    sys.exit(run_main(load(target), args, prog_name))
+
+
+if __name__ == "__main__":
+    main()
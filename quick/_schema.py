@@ -0,0 +1,225 @@
+"""Parameter schema of a click command tree
+
+`command_schema` turns a command (or group) into a json-able dict of names,
+types, defaults, help and nargs; `schema_command` builds stand-in click
+commands from it, without callbacks, that a form can be rendered from.
+Schemas are cached per TARGET (see `quick._runner`) and keyed by a hash of
+the source file of the target, so `quick.launch` can show the form before
+the module is imported.
+
+Only click is imported here.
+"""
+import hashlib
+import importlib.machinery
+import json
+import os
+
+import click
+
+from . import GCommand, GOption, _missing, _param_default, _cache_path
+
+VERSION = 1
+
+
+def _jsonable(value):
+    if value is getattr(click.core, "UNSET", _missing):
+        # click >= 8.3 marks unset values with a sentinel
+        return None
+    if callable(value):
+        # a dynamic default, the real command computes it
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def type_schema(tp):
+    if isinstance(tp, click.Tuple):
+        return {"name": "tuple", "types": [type_schema(t) for t in tp.types]}
+    if isinstance(tp, click.Choice):
+        return {"name": "choice", "choices": [str(c) for c in tp.choices],
+                "case_sensitive": tp.case_sensitive}
+    if isinstance(tp, (click.IntRange, click.FloatRange)):
+        return {"name": "intrange" if isinstance(tp, click.IntRange)
+                        else "floatrange",
+                "min": tp.min, "max": tp.max, "min_open": tp.min_open,
+                "max_open": tp.max_open, "clamp": tp.clamp}
+    if isinstance(tp, click.Path):
+        return {"name": "path", "exists": tp.exists,
+                "file_okay": tp.file_okay, "dir_okay": tp.dir_okay,
+                "writable": tp.writable, "readable": tp.readable,
+                "resolve_path": tp.resolve_path, "allow_dash": tp.allow_dash}
+    for name, cls in [("integer", click.types.IntParamType),
+                      ("float", click.types.FloatParamType),
+                      ("boolean", click.types.BoolParamType)]:
+        if isinstance(tp, cls):
+            return {"name": name}
+    # custom types are shown as text
+    return {"name": "string", "label": tp.name}
+
+
+class _LabeledString(click.types.StringParamType):
+    """text standing in for a custom type, named like it"""
+    def __init__(self, name):
+        self.name = name
+
+
+def schema_type(schema):
+    name = schema["name"]
+    args = {k: v for k, v in schema.items() if k != "name"}
+    if name == "tuple":
+        return click.Tuple([schema_type(t) for t in schema["types"]])
+    elif name == "choice":
+        return click.Choice(**args)
+    elif name == "intrange":
+        return click.IntRange(**args)
+    elif name == "floatrange":
+        return click.FloatRange(**args)
+    elif name == "path":
+        return click.Path(**args)
+    elif name == "string":
+        return _LabeledString(schema.get("label", click.STRING.name))
+    return {"integer": click.INT, "float": click.FLOAT,
+            "boolean": click.BOOL}.get(name, click.STRING)
+
+
+def param_schema(param):
+    schema = {
+        "param_type": "option" if isinstance(param, click.Option)
+                      else "argument",
+        "name": param.name,
+        "opts": list(param.opts),
+        "secondary_opts": list(param.secondary_opts),
+        "type": type_schema(param.type),
+        "required": param.required,
+        "nargs": param.nargs,
+        "multiple": param.multiple,
+        "default": _jsonable(_param_default(param)),
+    }
+    if isinstance(param, click.Option):
+        schema.update({
+            "help": param.help,
+            "is_flag": param.is_flag,
+            "is_bool_flag": param.is_bool_flag,
+            "flag_value": _jsonable(param.flag_value),
+            "count": param.count,
+            "hidden": param.hidden,
+        })
+        show_name = getattr(param, "show_name", _missing)
+        if show_name is not _missing:
+            schema["show_name"] = show_name
+    return schema
+
+
+def schema_param(schema):
+    opts, secondary = schema["opts"], schema["secondary_opts"]
+    if secondary:
+        head = opts[:len(opts) - len(secondary)]
+        decls = head + ["{}/{}".format(o, s) for o, s in
+                        zip(opts[len(head):], secondary)]
+    else:
+        decls = list(opts)
+    args = {
+        "required": schema["required"],
+        "default": schema["default"],
+    }
+    if schema["param_type"] == "argument":
+        return click.Argument([schema["name"]], type=schema_type(
+            schema["type"]), nargs=schema["nargs"], **args)
+    args.update(help=schema["help"], hidden=schema["hidden"],
+                multiple=schema["multiple"])
+    if schema["is_bool_flag"]:
+        args.update(is_flag=True)
+    elif schema["count"]:
+        args.update(count=True)
+    else:
+        args.update(type=schema_type(schema["type"]), nargs=schema["nargs"])
+        if schema["is_flag"]:
+            args.update(is_flag=True, flag_value=schema["flag_value"])
+    if "show_name" in schema:
+        return GOption([schema["name"]] + decls,
+                       show_name=schema["show_name"], **args)
+    return click.Option([schema["name"]] + decls, **args)
+
+
+def command_schema(cmd):
+    """json-able description of the command tree `cmd`"""
+    schema = {
+        "name": cmd.name,
+        "help": cmd.help,
+        "params": [param_schema(p) for p in cmd.params],
+    }
+    for attr in ["new_thread", "new_process", "timeout"]:
+        if hasattr(cmd, attr):
+            schema[attr] = getattr(cmd, attr)
+    if isinstance(cmd, click.Group):
+        schema["commands"] = [command_schema(c) for c in cmd.commands.values()]
+    return schema
+
+
+def schema_command(schema):
+    """stand-in click command of a `command_schema`, no callbacks"""
+    args = {
+        "name": schema["name"],
+        "help": schema["help"],
+        "params": [schema_param(p) for p in schema["params"]],
+    }
+    if "commands" in schema:
+        group = click.Group(**args)
+        for sub in schema["commands"]:
+            group.add_command(schema_command(sub))
+        return group
+    if "new_thread" in schema:
+        return GCommand(new_thread=schema["new_thread"],
+                        new_process=schema.get("new_process"),
+                        timeout=schema.get("timeout"), **args)
+    return click.Command(**args)
+
+
+def source_path(target):
+    """file defining TARGET, found without importing it"""
+    where = target.rpartition(":")[0]
+    if where.endswith(".py") or os.path.sep in where:
+        return os.path.abspath(where)
+    spec, path = None, None
+    for part in where.split("."):
+        spec = importlib.machinery.PathFinder.find_spec(part, path)
+        if spec is None:
+            return None
+        path = spec.submodule_search_locations
+    return spec.origin if spec and spec.has_location else None
+
+
+def _schema_file(target):
+    path = source_path(target)
+    if path is None or not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    digest.update("{}\0{}\0".format(VERSION, target).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read())
+    return _cache_path("schemas", digest.hexdigest() + ".json")
+
+
+def cached(target):
+    """schema of TARGET stored for its current source, None if missing"""
+    path = _schema_file(target)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store(target, schema):
+    path = _schema_file(target)
+    if path is None:
+        return
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "w") as f:
+        json.dump(schema, f)
+    os.replace(tmp, path)
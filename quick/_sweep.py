@@ -0,0 +1,129 @@
+"""Parameter sweeps: one run per combination of parameter values
+
+The values of a parameter are written like its values in the history (see
+`quick._gui.param_value`): "true"/"false" for a flag, a number for a counter,
+words separated by spaces for several arguments. A sweep field holds
+
+    a, b, c         a list
+    10..20          the integers from 10 to 20
+    0..1:0.25       a range with a step, needed for floats
+    *               every choice of a Choice, both states of a flag or
+                    every integer of a bounded IntRange
+
+`combinations` expands the fields into the cartesian product of their
+values. Only click is imported here.
+"""
+import itertools
+import math
+import re
+
+import click
+
+_range = re.compile(r"^(?P<start>[^:]+?)\s*\.\.\s*(?P<stop>[^:]+?)"
+                    r"(?:\s*:\s*(?P<step>.+))?$")
+
+
+def _int(text):
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def _float(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("{!r} is not a number".format(text)) from None
+
+
+def value_range(start, stop, step=None):
+    """the values from `start` to `stop`, both included, as strings"""
+    ints = [_int(t) for t in (start, stop, step or "1")]
+    if None not in ints:
+        start, stop, step = ints
+        if step == 0:
+            raise ValueError("the step of a range can not be 0")
+        if step > 0 and start > stop:
+            step = -step
+        return [str(v) for v in range(start, stop + (1 if step > 0 else -1),
+                                      step)]
+    if step is None:
+        raise ValueError("a range of floats needs a step, like 0..1:0.1")
+    start, stop, step = _float(start), _float(stop), _float(step)
+    if step == 0:
+        raise ValueError("the step of a range can not be 0")
+    if (stop - start) * step < 0:
+        step = -step
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [repr(round(start + i * step, 10)) for i in range(count)]
+
+
+def all_values(param):
+    """what "*" stands for in the sweep field of `param`"""
+    if getattr(param, "is_flag", False):
+        return ["true", "false"]
+    tp = param.type
+    if isinstance(tp, click.Choice):
+        return [str(c) for c in tp.choices]
+    if isinstance(tp, click.IntRange) and \
+            tp.min is not None and tp.max is not None:
+        return [str(v) for v in range(tp.min + tp.min_open,
+                                      tp.max - tp.max_open + 1)]
+    raise ValueError("* only stands for the values of a choice, a flag or "
+                     "a bounded integer range")
+
+
+def values(param, text):
+    """values of the sweep field `text` of `param`, [] when it is empty"""
+    text = text.strip()
+    if not text:
+        return []
+    if text == "*":
+        return all_values(param)
+    match = _range.match(text) if "," not in text else None
+    if match:
+        result = value_range(match.group("start"), match.group("stop"),
+                             match.group("step"))
+    else:
+        result = [v.strip() for v in text.split(",") if v.strip()]
+    _check_values(param, result)
+    return result
+
+
+def _check_values(param, values):
+    # tokens() builds the command line of these without click's checks
+    if getattr(param, "count", False):
+        for value in values:
+            if _int(value) is None or int(value) < 0:
+                raise ValueError("{!r} is no count, counts are integers "
+                                 "from 0".format(value))
+    elif getattr(param, "is_flag", False):
+        for value in values:
+            if value not in ("true", "false"):
+                raise ValueError("{!r} is no flag state, flags are true or "
+                                 "false".format(value))
+
+
+def tokens(param, value):
+    """command line tokens of `param` for its history value `value`"""
+    if isinstance(param, click.Option):
+        name = param.opts[0]
+        if param.count:
+            return [name] * int(value)
+        if param.is_flag:
+            # like `param_value`, a flag is on when its first name is given
+            return [name] if value == "true" else list(param.secondary_opts)
+        if param.nargs != 1:
+            return [name] + value.split()
+        return [name, value]
+    if param.nargs != 1:
+        return value.split()
+    return [value]
+
+
+def combinations(axes):
+    """dicts `{name: value}`, one per combination of the `(name, values)`"""
+    names = [name for name, _ in axes]
+    return [dict(zip(names, combination)) for combination in
+            itertools.product(*[v for _, v in axes])]
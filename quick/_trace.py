@@ -0,0 +1,140 @@
+"""Timing of the phases of a quick gui
+
+`profiler` records phases (qt start up, stylesheet, building the widgets of
+each command, first paint, every run ...) once it is enabled by
+`gui_it(..., profile=...)`, the QUICK_PROFILE environment variable or by
+adding a callback:
+
+    quick.profiler.add_callback(lambda event: print(event["name"], event["dur"]))
+
+The events can be dumped as a text report or as trace-event JSON, which
+chrome://tracing and Perfetto open.
+"""
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+class Profiler(object):
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.callbacks = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def add_callback(self, callback):
+        """call `callback(event)` for every finished phase, enables recording
+
+        `event` is a dict with the keys name, cat, start, dur (seconds
+        since the profiler was created), tid and args.
+        """
+        self.callbacks.append(callback)
+        self.enabled = True
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def record(self, name, start, end, cat="gui", **args):
+        """record a phase, `start` and `end` come from time.perf_counter"""
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "cat": cat,
+            "start": start - self._origin,
+            "dur": end - start,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+        for callback in list(self.callbacks):
+            callback(event)
+
+    @contextlib.contextmanager
+    def phase(self, name, cat="gui", **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), cat=cat, **args)
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def report(self):
+        """total, count and max duration per phase name"""
+        stats = collections.OrderedDict()
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            s = stats.setdefault(event["name"], [0, 0., 0.])
+            s[0] += 1
+            s[1] += event["dur"]
+            s[2] = max(s[2], event["dur"])
+        lines = ["{:24} {:>7} {:>11} {:>11}".format(
+            "phase", "count", "total ms", "max ms")]
+        for name, (count, total, longest) in stats.items():
+            lines.append("{:24} {:>7} {:>11.2f} {:>11.2f}".format(
+                name, count, total * 1e3, longest * 1e3))
+        return "\n".join(lines)
+
+    def trace_events(self):
+        """the events in the trace-event format, as a json-able dict"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": [{
+            "name": e["name"],
+            "cat": e["cat"],
+            "ph": "X",
+            "ts": e["start"] * 1e6,
+            "dur": e["dur"] * 1e6,
+            "pid": pid,
+            "tid": e["tid"],
+            "args": {k: v if isinstance(v, (int, float, bool)) else str(v)
+                     for k, v in e["args"].items()},
+        } for e in events]}
+
+    def dump(self, target=True):
+        """write the events
+
+        `target` is a file name, trace-event JSON if it ends with .json and
+        the text report otherwise. True (or "1") prints the report to the
+        standard error of the process.
+        """
+        if target is True or target == "1":
+            sys.__stderr__.write(self.report() + "\n")
+        elif str(target).endswith(".json"):
+            with open(target, "w") as f:
+                json.dump(self.trace_events(), f)
+        else:
+            with open(target, "w") as f:
+                f.write(self.report() + "\n")
+
+
+def profile_target(profile=None):
+    """the `dump` target of `gui_it(profile=...)`, None when it is off
+
+    `profile` defaults to $QUICK_PROFILE, where "0" and "" mean off.
+    """
+    if profile is None:
+        profile = os.environ.get("QUICK_PROFILE", "")
+    if profile is False or profile in ("", "0"):
+        return None
+    return profile
+
+
+profiler = Profiler()
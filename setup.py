@@ -5,11 +5,13 @@ setup(name='quick',
       author='Shen Zhou',
       author_email='shenz34206@hotmail.com',
       license='GNU GPLv3',
-      py_modules=['quick'],
+      packages=['quick'],
+      python_requires='>=3.8',
       install_requires=[
           'click>=5.0',
           ],
       extras_require={
+          'gui': ["PyQt5>=5.15"],
           'qtstyle':  ["qdarkstyle"]
           },
       )
@@ -0,0 +1,239 @@
+"""Benchmarks for quick, run under the qt offscreen platform
+
+    python test/benchmark.py            # compare with benchmark_baseline.json
+    python test/benchmark.py --save     # store the results as new baseline
+
+Measured:
+  * App construction (only the visible tabs) and building every tab of a
+    synthetic click tree, time and growth of the resident memory
+  * lines per second from GuiStream to OutputEdit
+  * latency from Run to the first output of a command on the thread pool
+
+The exit status is 1 when a result is worse than the baseline by more than
+the threshold.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+
+import quick
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "benchmark_baseline.json")
+
+# name: True if bigger is better
+METRICS = {
+    "app_construction_s": False,
+    "app_construction_rss_mb": False,
+    "build_all_tabs_s": False,
+    "build_all_tabs_rss_mb": False,
+    "output_lines_per_s": True,
+    "run_first_output_s": False,
+}
+
+
+def _option(kind, i):
+    name = "--opt{}".format(i)
+    return {
+        0: lambda: click.Option([name], help="a string"),
+        1: lambda: click.Option([name], type=int),
+        2: lambda: click.Option([name], type=float, default=2.5),
+        3: lambda: click.Option([name], type=click.IntRange(0, 100)),
+        4: lambda: click.Option([name], type=click.Choice(["a", "b", "c"])),
+        5: lambda: click.Option([name], type=click.Path(dir_okay=False)),
+        6: lambda: click.Option([name], is_flag=True),
+        7: lambda: click.Option([name + "/--no-opt{}".format(i)],
+                                default=True),
+        8: lambda: click.Option([name], count=True),
+        9: lambda: click.Option([name], type=(int, str), nargs=2),
+    }[kind % 10]()
+
+
+def synthetic_cli(groups, commands, options):
+    """`groups` groups of `commands` commands with `options` options each"""
+    def callback(**kwargs):
+        print("done")
+
+    root = click.Group("root")
+    for g in range(groups):
+        group = click.Group("group{}".format(g))
+        root.add_command(group)
+        for c in range(commands):
+            params = [_option(k, k) for k in range(options)]
+            params.append(click.Argument(["items"], nargs=-1))
+            group.add_command(click.Command(
+                "command{}".format(c), params=params, callback=callback,
+                help="synthetic command"))
+    return root
+
+
+def rss_mb():
+    """current resident memory, the peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2.**20
+    except OSError:
+        # ru_maxrss is in kB on linux, bytes on macos
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def build_all_tabs(widget):
+    built = 0
+    pending = list(widget.findChildren(quick._InputTabWidget))
+    while pending:
+        tabs = pending.pop()
+        for i in range(tabs.count()):
+            page = tabs.widget(i)
+            if not page.is_built():
+                tabs.setCurrentIndex(i)
+                built += 1
+                pending.extend(page.findChildren(quick._InputTabWidget))
+    return built
+
+
+def bench_app(cli):
+    rss = rss_mb()
+    start = time.perf_counter()
+    ex = quick.App(cli, run_exit=False, new_thread=False, output="term")
+    QtWidgets.QApplication.processEvents()
+    construction = time.perf_counter() - start
+    construction_rss = rss_mb() - rss
+
+    rss = rss_mb()
+    start = time.perf_counter()
+    build_all_tabs(ex)
+    QtWidgets.QApplication.processEvents()
+    all_tabs = time.perf_counter() - start
+    all_tabs_rss = rss_mb() - rss
+    ex.close()
+    ex.deleteLater()
+    return {
+        "app_construction_s": construction,
+        "app_construction_rss_mb": construction_rss,
+        "build_all_tabs_s": all_tabs,
+        "build_all_tabs_rss_mb": all_tabs_rss,
+    }
+
+
+def bench_output(lines):
+    stream = quick.GuiStream()
+    edit = quick.OutputEdit()
+    stream.textWritten.connect(edit.print)
+    received = [0]
+    stream.textWritten.connect(
+        lambda text: received.__setitem__(0, received[0] + text.count("\n")))
+
+    def produce():
+        for i in range(lines):
+            stream.write("output line {}\n".format(i))
+        stream.flush()
+
+    start = time.perf_counter()
+    worker = threading.Thread(target=produce)
+    worker.start()
+    while received[0] < lines:
+        QtWidgets.QApplication.processEvents(
+                QtCore.QEventLoop.AllEvents, 10)
+    elapsed = time.perf_counter() - start
+    worker.join()
+    edit.deleteLater()
+    return {"output_lines_per_s": lines / elapsed}
+
+
+def bench_run(cli):
+    stdout, stderr = sys.stdout, sys.stderr
+    first = []
+    try:
+        ex = quick.App(cli, run_exit=False, new_thread=True, output="gui")
+        start = time.perf_counter()
+        job = ex.run_cmd(["root", "group0", "command0"], new_thread=True)
+        job.stream.textWritten.connect(
+                lambda text: first.append(time.perf_counter()))
+        while not first:
+            QtWidgets.QApplication.processEvents(
+                    QtCore.QEventLoop.AllEvents, 5)
+        while ex.jobs.running():
+            QtWidgets.QApplication.processEvents(
+                    QtCore.QEventLoop.AllEvents, 5)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    ex.close()
+    return {"run_first_output_s": first[0] - start}
+
+
+def best(results):
+    """best value of each metric over the repeats"""
+    merged = {}
+    for name, higher in METRICS.items():
+        values = [r[name] for r in results if name in r]
+        merged[name] = max(values) if higher else min(values)
+    return merged
+
+
+def compare(results, baseline, threshold):
+    failed = False
+    for name, higher in METRICS.items():
+        value, base = results[name], baseline.get(name)
+        if base is None or base <= 0:
+            status = "no baseline"
+        else:
+            change = (value - base) / base
+            worse = -change if higher else change
+            # memory is measured in whole pages, ignore tiny baselines
+            if worse > threshold and not (name.endswith("_mb") and base < 1):
+                status = "REGRESSION {:+.0%}".format(change)
+                failed = True
+            else:
+                status = "{:+.0%}".format(change)
+        print("{:28} {:>14.4f}  {}".format(name, value, status))
+    return failed
+
+
+@click.command()
+@click.option("--groups", default=3, help="groups in the synthetic tree")
+@click.option("--commands", default=20, help="commands per group")
+@click.option("--options", default=30, help="options per command")
+@click.option("--lines", default=100000, help="lines printed for throughput")
+@click.option("--repeat", default=3, help="runs, the best one is kept")
+@click.option("--threshold", default=0.25,
+              help="allowed relative regression against the baseline")
+@click.option("--save", is_flag=True, help="store results as the baseline")
+@click.option("--baseline", default=BASELINE, type=click.Path())
+def main(groups, commands, options, lines, repeat, threshold, save, baseline):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    cli = synthetic_cli(groups, commands, options)
+    results = []
+    for i in range(repeat):
+        r = bench_app(cli)
+        r.update(bench_output(lines))
+        r.update(bench_run(cli))
+        results.append(r)
+    results = best(results)
+
+    if save:
+        with open(baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("saved", baseline)
+        return
+    reference = {}
+    if os.path.exists(baseline):
+        with open(baseline) as f:
+            reference = json.load(f)
+    if compare(results, reference, threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
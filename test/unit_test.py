@@ -2,7 +2,14 @@ import quick
 import click
 import unittest
 
+import asyncio
+from functools import partial
+import os
+import sqlite3
+import subprocess
 import sys
+import tempfile
+import time
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 from PyQt5 import QtCore
@@ -13,12 +20,914 @@ from PyQt5.QtTest import QTest
 def select_name(name):
     pass
 
+@click.group()
+def group():
+    pass
+
+@group.command()
+def first():
+    pass
+
+@group.command()
+@click.option("--name")
+def second(name):
+    second.calls.append(name)
+    print(name)
+second.calls = []
+
+@group.command()
+@click.option("--seconds", type=float, default=30)
+def spin(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+@group.command()
+@click.option("--delay", type=float, default=0.2)
+async def nap(delay):
+    await asyncio.sleep(delay)
+    print("nap", delay)
+
+@group.command()
+@click.option("--src", type=click.File())
+async def head(src):
+    await asyncio.sleep(0.01)
+    # the context of the run is still open after an await
+    print(click.get_current_context().info_name, src.readline().strip())
+
+@group.command()
+@click.option("--code", type=int, default=0)
+@click.pass_context
+def leave(ctx, code):
+    ctx.exit(code)
+
+@group.command()
+@click.option("--steps", type=int, default=100000)
+def crunch(steps):
+    with click.progressbar(range(steps), label="crunch") as bar:
+        for i in bar:
+            pass
+
+@group.command()
+@click.option("--size", type=click.IntRange(1, 3), default=1)
+@click.option("--mode", type=click.Choice(["fast", "slow"]))
+@click.option("--fail", is_flag=True)
+def grid(size, mode, fail):
+    print(size, mode)
+    if fail:
+        sys.exit(3)
+
+def wait_until(condition, timeout=5000):
+    while not condition() and timeout > 0:
+        QTest.qWait(10)
+        timeout -= 10
+    return condition()
+
 class TestFunction(unittest.TestCase):
     def setUp(self):
-        self._app = QtWidgets.QApplication(sys.argv)
+        self._app = QtWidgets.QApplication.instance() or \
+                QtWidgets.QApplication(sys.argv)
         
     def test_opt_to_widget(self):
         self.assertIsInstance(quick.opt_to_widget(select_name.params[0])[0][1], QtWidgets.QComboBox)
 
+    def test_widget_registry(self):
+        class Celsius(click.types.FloatParamType):
+            name = "celsius"
+
+        registry = quick.WidgetRegistry()
+        registry.register(click.types.ParamType, "string")
+        self.assertEqual(registry.resolve(Celsius), "string")
+
+        @registry.register(click.types.FloatParamType)
+        def float_widget(opt):
+            return "float"
+        self.assertIs(registry.resolve(Celsius), float_widget)
+        opt = click.Option(["--temp"], type=Celsius())
+        self.assertEqual(registry.to_widget(opt), "float")
+
+        slider = quick.opt_to_widget(
+                click.Option(["--level"], type=click.IntRange(0, 5)))[0][1]
+        self.assertIsInstance(slider, quick.GSlider)
+
+    def test_list_model(self):
+        view = quick.GListView(click.Argument(["files"], nargs=-1))
+        model = view.model
+        model.insert_values(0, [str(i) for i in range(100000)])
+        self.assertEqual(model.rowCount(), 100000)
+        model.remove_rows([0, 1, 2, 10, 99999])
+        self.assertEqual(model.rowCount(), 99995)
+        self.assertEqual(model.values()[:4], ["3", "4", "5", "6"])
+        self.assertEqual(model.values()[-1], "99998")
+
+        tuple_view = quick.GListView(
+                click.Option(["--pair"], type=(int, str), nargs=2))
+        index = tuple_view.model.index(1, 0)
+        self.assertEqual(index.data(), "text")
+        self.assertEqual(index.data(quick._GTypeRole), click.STRING)
+
+    def test_shared_file_dialog(self):
+        edits = [quick.GLineEdit_path(file_okay=True, dir_okay=False)
+                 for i in range(3)]
+        self.assertEqual(quick.GFileDialog._pool, {})
+        self.assertIs(edits[0].fdlg, edits[2].fdlg)
+        self.assertIsNot(edits[0].fdlg, quick.GLineEdit_path().fdlg)
+        quick.GFileDialog.clear_pool()
+
+    def test_path_completion(self):
+        root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(root, "data"))
+        open(os.path.join(root, "data.txt"), "w").close()
+        edit = quick.GLineEdit_path(file_okay=False)
+        edit.setText(root + os.sep)
+        edit.complete_path(edit.text())
+        model = edit.completer().model()
+        self.assertTrue(wait_until(lambda: model.rowCount() > 0))
+        self.assertEqual(model.stringList(),
+                         [os.path.join(root, "data") + os.sep])
+
+    @unittest.skipUnless(quick.GStyle.check_style("qdarkstyle"),
+                         "qdarkstyle is not installed")
+    def test_stylesheet_cache(self):
+        import qdarkstyle
+        cache_home = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp()
+        load = qdarkstyle.load_stylesheet_pyqt5
+        try:
+            quick.GStyle._cache.clear()
+            sheet = quick.GStyle("qdarkstyle").stylesheet
+            quick.GStyle._cache.clear()
+            qdarkstyle.load_stylesheet_pyqt5 = None
+            self.assertEqual(quick.GStyle("qdarkstyle").stylesheet, sheet)
+        finally:
+            qdarkstyle.load_stylesheet_pyqt5 = load
+            if cache_home is None:
+                del os.environ["XDG_CACHE_HOME"]
+            else:
+                os.environ["XDG_CACHE_HOME"] = cache_home
+
+    def test_window_stylesheet(self):
+        sheet = "QWidget { color: #123456; }"
+        ex = quick.App(group, run_exit=False, new_thread=False,
+                       output='term', history=False, stylesheet=sheet)
+        self.assertEqual(ex.styleSheet(), sheet)
+        # the other windows of the App are styled too
+        self.assertEqual(ex.jobPanel.styleSheet(), sheet)
+        self.assertEqual(ex.show_sweep(ex.opt_set).styleSheet(), sheet)
+
+    def test_lazy_tabs(self):
+        ex = quick.App(group, run_exit=False, new_thread=False, output='term')
+        tabs = ex.findChild(quick._InputTabWidget)
+        self.assertTrue(tabs.widget(0).is_built())
+        self.assertFalse(tabs.widget(1).is_built())
+        tabs.setCurrentIndex(1)
+        self.assertTrue(tabs.widget(1).is_built())
+
+    def test_per_run_argv(self):
+        ex = quick.App(group, run_exit=False, new_thread=False, output='term')
+        tabs = ex.findChild(quick._InputTabWidget)
+        tabs.setCurrentIndex(1)
+        layout = tabs.widget(1).content
+        layout.widgets[0][1].setText("quick")
+        argv = layout.generate_argv()
+        self.assertEqual(argv, ["group", "second", "--name", "quick"])
+        sys_argv = list(sys.argv)
+        quick.RunCommand(group, False, argv).run()
+        self.assertEqual(second.calls[-1], "quick")
+        self.assertEqual(sys.argv, sys_argv)
+
+    def test_field_validation(self):
+        class Even(click.ParamType):
+            name = "even"
+            threads = []
+
+            def convert(self, value, param, ctx):
+                self.threads.append(QtCore.QThread.currentThread())
+                if int(value) % 2:
+                    self.fail("{} is odd".format(value), param, ctx)
+                return int(value)
+
+        @click.command()
+        @click.option("--count", type=Even(), required=True)
+        @click.option("--output", type=click.Path(exists=True))
+        def cmd(count, output):
+            pass
+
+        ex = quick.App(cmd, run_exit=False, new_thread=False, output='term',
+                       history=False)
+        layout = ex.opt_set
+        run = ex.findChild(QtWidgets.QPushButton, "run")
+        # the required field starts empty
+        self.assertTrue(wait_until(lambda: not run.isEnabled()))
+        self.assertIn("count", run.toolTip())
+
+        layout.widgets[0][1].setText("3")
+        layout.widgets[1][1].setText("/no/such/file")
+        self.assertTrue(wait_until(
+            lambda: set(layout.errors()) == {"count", "output"}))
+        self.assertIn("3 is odd", layout.widgets[0][1].toolTip())
+        self.assertFalse(run.isEnabled())
+        self.assertNotIn(self._app.thread(), Even.threads)
+
+        layout.widgets[0][1].setText("4")
+        layout.widgets[1][1].setText("")
+        self.assertTrue(wait_until(run.isEnabled))
+        self.assertEqual(layout.errors(), {})
+
+        # a value checked before comes from the cache
+        calls = len(Even.threads)
+        layout.widgets[0][1].setText("3")
+        self.assertTrue(wait_until(lambda: not run.isEnabled()))
+        self.assertEqual(len(Even.threads), calls)
+
+    def test_file_validation(self):
+        @click.command()
+        @click.option("--source", type=click.File("r"))
+        @click.option("--target", type=click.File("w", lazy=False))
+        @click.option("--data", type=click.Path(exists=True))
+        def cmd(source, target, data):
+            pass
+
+        folder = tempfile.mkdtemp()
+        ex = quick.App(cmd, run_exit=False, new_thread=False, output='term',
+                       history=False)
+        layout = ex.opt_set
+        run = ex.findChild(QtWidgets.QPushButton, "run")
+        data = os.path.join(folder, "data")
+        layout.widgets[0][1].setText(os.path.join(folder, "missing"))
+        layout.widgets[1][1].setText(os.path.join(folder, "out"))
+        layout.widgets[2][1].setText(data)
+        self.assertTrue(wait_until(
+            lambda: set(layout.errors()) == {"source", "data"}))
+        # checking never opens, thus never creates, a file
+        self.assertEqual(os.listdir(folder), [])
+        open(data, "w").close()
+        self.assertTrue(wait_until(lambda: set(layout.errors()) == {"source"}))
+        self.assertFalse(run.isEnabled())
+
+    def test_option_filter(self):
+        @click.group()
+        def tree():
+            pass
+
+        @tree.command()
+        @click.option("--width", type=int, help="size of the image")
+        @click.option("--height", type=int, help="size of the image")
+        @click.option("--title")
+        def plot(width, height, title):
+            pass
+
+        @tree.command()
+        @click.option("--color", type=click.Choice(["red", "blue"]))
+        @click.option("--alpha", cls=quick.GOption, show_name="opacity")
+        def paint(color, alpha):
+            pass
+
+        for i in range(6):
+            paint.params.append(click.Option(["--extra{}".format(i)]))
+
+        ex = quick.App(tree, run_exit=False, new_thread=False,
+                       output='term', history=False)
+        layout = ex.opt_set
+        self.assertIsNotNone(layout.filter_box)
+        plot_layout = layout.tabs.widget(0).content
+
+        def shown(cmd_layout):
+            # widgets of a new page are shown by a queued call
+            self._app.processEvents()
+            return [p.name for p, widgets in zip(cmd_layout.func.params,
+                                                 cmd_layout.widgets)
+                    if widgets[-1].isVisibleTo(cmd_layout.parentWidget())]
+
+        layout.filter_box.setText("size")
+        self.assertEqual(shown(plot_layout), ["width", "height"])
+        self.assertEqual([layout.tabs.isTabVisible(i) for i in range(2)],
+                         [True, False])
+        layout.filter_box.setText("size height")
+        self.assertEqual(shown(plot_layout), ["height"])
+
+        # a tab built while filtered gets the filter too
+        layout.filter_box.setText("opac")
+        self.assertEqual([layout.tabs.isTabVisible(i) for i in range(2)],
+                         [False, True])
+        self.assertEqual(shown(layout.tabs.widget(1).build()), ["alpha"])
+
+        layout.filter_box.clear()
+        self.assertEqual(shown(plot_layout), ["width", "height", "title"])
+        self.assertEqual(len(shown(layout.tabs.widget(1).content)), 8)
+
+        # small trees have no filter box
+        ex = quick.App(group, run_exit=False, new_thread=False,
+                       output='term', history=False)
+        self.assertIsNone(ex.opt_set.filter_box)
+
+    def test_sweep(self):
+        size = grid.params[0]
+        self.assertEqual(quick._sweep.values(size, "1..3"), ["1", "2", "3"])
+        self.assertEqual(quick._sweep.values(size, "3..1"), ["3", "2", "1"])
+        self.assertEqual(quick._sweep.values(size, "*"), ["1", "2", "3"])
+        self.assertEqual(quick._sweep.values(size, " 1, 3,"), ["1", "3"])
+        self.assertEqual(quick._sweep.values(size, "0..1:0.25"),
+                         ["0.0", "0.25", "0.5", "0.75", "1.0"])
+        self.assertRaises(ValueError, quick._sweep.values, size, "0..1.5")
+        self.assertEqual(quick._sweep.values(grid.params[2], "*"),
+                         ["true", "false"])
+        self.assertRaises(ValueError, quick._sweep.values, grid.params[2],
+                          "yes")
+        verbose = click.Option(["-v"], count=True)
+        self.assertEqual(quick._sweep.values(verbose, "0..2"), ["0", "1", "2"])
+        self.assertRaises(ValueError, quick._sweep.values, verbose, "a, b")
+        fast = click.Option(["--fast"], is_flag=True, flag_value="quick")
+        self.assertEqual(quick._sweep.values(fast, "*"), ["true", "false"])
+        self.assertEqual(quick._sweep.tokens(fast, "true"), ["--fast"])
+        self.assertEqual(quick._sweep.tokens(fast, "false"), [])
+
+        ex = quick.App(group, run_exit=False, new_thread=False,
+                       output='term', history=False)
+        tabs = ex.findChild(quick._InputTabWidget)
+        tabs.setCurrentIndex([tabs.tabText(i)
+                              for i in range(tabs.count())].index("grid"))
+        layout = tabs.currentWidget().content
+        panel = ex.show_sweep(layout)
+        size_field, mode_field, fail_field = panel.fields
+        size_field.setText("*")
+        mode_field.setText("fast, slow")
+        self.assertEqual(panel.status.text(), "6 runs")
+        size_field.setText("1..9")
+        panel.run_button.click()
+        self.assertIn("size", panel.status.text())
+        self.assertEqual(ex.jobs.jobs, [])
+
+        size_field.setText("2..3")
+        fail_field.setText("maybe")
+        self.assertIn("fail", panel.status.text())
+        self.assertFalse(panel.run_button.isEnabled())
+        fail_field.setText("*")
+
+        shown = []
+        ex.show_error = shown.append
+        ex.set_runnable(False)
+        self.assertEqual(ex.run_sweep(layout, [{"size": "2"}, {"size": "3"}]),
+                         [])
+        self.assertEqual(len(shown), 1)
+        ex.set_runnable(True)
+
+        ex.jobs.set_max_jobs(4)
+        running = []
+
+        def count_running(job):
+            running.append(sum(j.state == quick.Job.RUNNING
+                               for j in ex.jobs.jobs))
+
+        ex.jobs.jobAdded.connect(lambda job: job.stateChanged.connect(
+            partial(count_running, job)))
+        panel.max_jobs.setValue(2)
+        panel.run_button.click()
+        # the sweep has a limit of its own, the queue keeps its limit
+        self.assertEqual(ex.jobs.max_jobs, 4)
+        jobs = ex.jobs.jobs
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual(jobs[0].argv, ("group", "grid", "--size", "2",
+                                        "--mode", "fast", "--fail"))
+        self.assertEqual(jobs[-1].argv, ("group", "grid", "--size", "3",
+                                         "--mode", "slow"))
+        self.assertTrue(all(job.new_process for job in jobs))
+        self.assertTrue(wait_until(lambda: not ex.jobs.running(), 30000))
+        self.assertEqual([job.exit_code for job in jobs], [3, 0] * 4)
+        self.assertEqual(max(running), 2)
+        # the form itself is left alone
+        self.assertEqual(layout.generate_argv(), ["group", "grid", "--size",
+                                                  "1", "--mode", "fast"])
+
+    def test_tab_eviction(self):
+        @click.group()
+        def tree():
+            pass
+
+        @tree.group()
+        @click.option("--level")
+        def inner(level):
+            pass
+
+        for name in ["a", "b", "c"]:
+            inner.add_command(click.Command(
+                name, params=[click.Option(["--value"])]))
+            tree.add_command(click.Command(
+                name, params=[click.Option(["--value"])]))
+
+        ex = quick.App(tree, run_exit=False, new_thread=False,
+                       output='term', history=False, max_tabs=3)
+        tabs = ex.opt_set.tabs
+        inner_layout = tabs.widget(0).content
+        inner_layout.widgets[0][1].setText("deep")
+        inner_layout.tabs.setCurrentIndex(2)
+        inner_layout.tabs.widget(2).content.widgets[0][1].setText("inner c")
+        for i in range(1, 4):
+            tabs.setCurrentIndex(i)
+            tabs.widget(i).content.widgets[0][1].setText(str(i))
+            self.assertLessEqual(len(ex.tab_cache.pages), 3)
+
+        # the inner group went first, with its sub commands
+        self.assertFalse(tabs.widget(0).is_built())
+        self.assertEqual(tabs.widget(0).saved["tabs"]["c"]["form"]["value"],
+                         [None, "inner c"])
+        self.assertTrue(tabs.widget(3).is_built())
+        QtCore.QCoreApplication.sendPostedEvents(
+                None, QtCore.QEvent.DeferredDelete)
+        self.assertEqual(len(ex.findChildren(quick.CommandLayout)), 4)
+
+        tabs.setCurrentIndex(0)
+        inner_layout = tabs.widget(0).content
+        self.assertEqual(inner_layout.widgets[0][1].text(), "deep")
+        self.assertEqual(inner_layout.tabs.currentIndex(), 2)
+        self.assertEqual(
+            inner_layout.tabs.widget(2).content.generate_argv(),
+            ["tree", "inner", "--level", "deep", "c", "--value", "inner c"])
+        tabs.setCurrentIndex(1)
+        self.assertEqual(tabs.widget(1).content.widgets[0][1].text(), "1")
+
+    def test_run_history(self):
+        path = os.path.join(tempfile.mkdtemp(), "history.sqlite")
+        ex = quick.App(group, run_exit=False, new_thread=False, output='term',
+                       history=path)
+        tabs = ex.findChild(quick._InputTabWidget)
+        tabs.setCurrentIndex(1)
+        layout = tabs.widget(1).content
+        for name in ["peng", "bo"]:
+            layout.widgets[0][1].setText(name)
+            layout.run_slot(layout.generate_argv())
+        self.assertTrue(wait_until(lambda: not ex.jobs.running()))
+
+        runs = ex.history.search("name=peng")
+        self.assertEqual([r["argv"] for r in runs],
+                         [["group", "second", "--name", "peng"]])
+        self.assertEqual(runs[0]["command"], "group second")
+        self.assertEqual(runs[0]["exit_code"], 0)
+        self.assertEqual(len(ex.history.search("bo", command="group second")), 1)
+        self.assertEqual(ex.history.search(command="group first"), [])
+
+        tabs.setCurrentIndex(0)
+        layout.widgets[0][1].setText("")
+        self.assertIs(ex.restore_run(runs[0]), layout)
+        self.assertEqual(tabs.currentIndex(), 1)
+        self.assertEqual(layout.widgets[0][1].text(), "peng")
+        ex.rerun(runs[0])
+        self.assertTrue(wait_until(lambda: not ex.jobs.running()))
+        self.assertEqual(second.calls[-1], "peng")
+        self.assertEqual(len(ex.history.search("name=peng")), 2)
+        ex.history.close()
+
+    def test_history_default_path(self):
+        data_home = os.environ.get("XDG_DATA_HOME")
+        os.environ["XDG_DATA_HOME"] = folder = tempfile.mkdtemp()
+        try:
+            ex = quick.App(group, run_exit=False, new_thread=False,
+                           output='term', history=True)
+            # nothing is written before a run is recorded
+            self.assertEqual(os.listdir(folder), [])
+            ex.history.add("group first", ["group", "first"])
+            self.assertTrue(os.path.isfile(
+                os.path.join(folder, "quick", "history.sqlite")))
+            ex.history.close()
+        finally:
+            if data_home is None:
+                del os.environ["XDG_DATA_HOME"]
+            else:
+                os.environ["XDG_DATA_HOME"] = data_home
+
+    def test_history_text_search(self):
+        path = os.path.join(tempfile.mkdtemp(), "history.sqlite")
+        old = sqlite3.connect(path)
+        old.executescript("""CREATE TABLE runs (id INTEGER PRIMARY KEY,
+            command TEXT NOT NULL, argv TEXT NOT NULL, form TEXT,
+            started REAL NOT NULL, duration REAL, exit_code INTEGER);
+            INSERT INTO runs (command, argv, started)
+            VALUES ('tree inner', '["tree", "--level", "x", "inner", "c"]', 1);
+            """)
+        old.close()
+        history = quick.History(path)
+        history.add("group second", ["group", "second", "--name", "café"],
+                    started=2.)
+        history.add("group second", ["group", "second", "--name", '"hi"'],
+                    started=3.)
+        history.add("group second", ["group", "second", "--name", "a b"],
+                    started=4.)
+        self.assertEqual(len(history.search("café")), 1)
+        self.assertEqual(len(history.search("'\"hi\"'")), 1)
+        self.assertEqual(len(history.search("'a b'")), 1)
+        runs = history.search("--level")
+        self.assertEqual(len(runs), 1)
+
+        model = quick.HistoryTableModel()
+        model.set_runs(runs + history.search("'a b'"))
+        self.assertEqual(model.data(model.index(0, 2)), "--level x inner c")
+        self.assertEqual(model.data(model.index(1, 2)), "second --name 'a b'")
+        history.close()
+
+    def test_schema_launch(self):
+        schema = quick.command_schema(group)
+        self.assertEqual(
+            quick.command_schema(quick.schema_command(schema)), schema)
+        files = click.Command("files", params=[
+            click.Option(["--src"], type=click.File()),
+            click.Option(["--uid"], type=click.UUID)])
+        schema = quick.command_schema(files)
+        self.assertEqual(
+            quick.command_schema(quick.schema_command(schema)), schema)
+        self.assertEqual(quick.schema_command(schema).params[0].type.name,
+                         "filename")
+        self.assertIsNone(schema["params"][0]["flag_value"])
+
+        folder = tempfile.mkdtemp()
+        script = os.path.join(folder, "tool.py")
+        with open(script, "w") as f:
+            f.write("import click\n"
+                    "@click.command()\n"
+                    "@click.option('--name')\n"
+                    "@click.option('--src', type=click.File())\n"
+                    "def tool(name, src):\n"
+                    "    print('hi', name)\n")
+        target = script + ":tool"
+        cache_home = os.environ.get("XDG_CACHE_HOME")
+        os.environ["XDG_CACHE_HOME"] = folder
+        try:
+            self.assertIsNone(quick._schema.cached(target))
+            stand_in = quick.schema_command(
+                    {"name": "tool", "help": None, "params": []})
+            ex = quick.App(stand_in, run_exit=False, new_thread=False,
+                           output='term', history=False)
+            ex.load_target(target)
+            self.assertTrue(wait_until(lambda: ex.runnable))
+
+            # a stand-in of the same schema keeps the form and its values
+            stand_in = quick.schema_command(quick._schema.cached(target))
+            ex = quick.App(stand_in, run_exit=False, new_thread=False,
+                           output='term', history=False)
+            layout = ex.opt_set
+            layout.widgets[0][1].setText("typed")
+            ex.load_target(target)
+            self.assertTrue(wait_until(lambda: ex.runnable))
+            self.assertIs(ex.opt_set, layout)
+            self.assertEqual(layout.widgets[0][1].text(), "typed")
+
+            stand_in = quick.schema_command({"name": "tool", "help": None,
+                "params": quick._schema.cached(target)["params"][:1]})
+            ex = quick.App(stand_in, run_exit=False, new_thread=False,
+                           output='term', history=False)
+            ex.opt_set.widgets[0][1].setText("typed")
+            ex.load_target(target)
+            run = ex.findChild(QtWidgets.QPushButton, "run")
+            self.assertFalse(run.isEnabled())
+            self.assertTrue(wait_until(lambda: ex.runnable))
+            # the module has an option the stand-in lacks, form is rebuilt
+            self.assertEqual([p.name for p in ex.opt_set.func.params],
+                             ["name", "src"])
+            self.assertEqual(ex.opt_set.widgets[0][1].text(), "typed")
+            self.assertTrue(
+                    ex.findChild(QtWidgets.QPushButton, "run").isEnabled())
+            self.assertEqual(quick._schema.cached(target),
+                             quick.command_schema(ex.func))
+        finally:
+            if cache_home is None:
+                del os.environ["XDG_CACHE_HOME"]
+            else:
+                os.environ["XDG_CACHE_HOME"] = cache_home
+
+    def test_job_queue(self):
+        queue = quick.JobQueue(max_jobs=2)
+        jobs = [queue.submit(quick.Job(group, ["group", "first"],
+                                       new_thread=True))
+                for i in range(5)]
+        queue.cancel(jobs[-1])
+        self.assertEqual(len(queue.running()), 2)
+        self.assertEqual([j.state for j in jobs[2:]],
+                         [quick.Job.QUEUED]*2 + [quick.Job.CANCELLED])
+        self.assertTrue(wait_until(lambda: not queue.running()))
+        self.assertEqual([j.state for j in jobs],
+                         [quick.Job.DONE]*4 + [quick.Job.CANCELLED])
+        self.assertEqual(jobs[0].exit_code, 0)
+
+    def test_process_mode(self):
+        queue = quick.JobQueue(max_jobs=1)
+        outputs, errors = [], []
+        stream = quick.GuiStream(max_latency=10)
+        stream.textWritten.connect(outputs.append)
+        job = quick.Job(group, ["group", "second", "--name", "child"],
+                        new_process=True)
+        job.stream = stream
+        queue.submit(job)
+        self.assertTrue(wait_until(lambda: not queue.running(), 30000))
+        self.assertEqual((job.state, job.exit_code), (quick.Job.DONE, 0))
+        self.assertTrue(wait_until(lambda: "child\n" in "".join(outputs)))
+
+        def factory():
+            @click.command()
+            def made():
+                pass
+            return made
+
+        for mode in [True, "worker"]:
+            job = quick.Job(factory(), ["made"], new_process=mode)
+            job.error.connect(errors.append)
+            queue.submit(job)
+            # no child can import it, the job fails and frees its slot
+            self.assertEqual(job.state, quick.Job.FAILED)
+            self.assertEqual(queue.running(), [])
+        self.assertEqual(len(errors), 2)
+        self.assertIn("module level", errors[0])
+
+    def test_worker_process(self):
+        queue = quick.JobQueue(max_jobs=1)
+        outputs = []
+        for name in ["peng", "bo"]:
+            stream = quick.GuiStream(max_latency=10)
+            stream.textWritten.connect(outputs.append)
+            job = quick.Job(group, ["group", "second", "--name", name],
+                            new_process="worker")
+            job.stream = stream
+            queue.submit(job)
+        self.assertTrue(wait_until(lambda: not queue.running(), 30000))
+        self.assertEqual(len(queue.workers.workers), 1)
+        self.assertEqual([j.exit_code for j in queue.jobs], [0, 0])
+        self.assertTrue(wait_until(lambda: "bo\n" in "".join(outputs)))
+        self.assertIn("peng\n", "".join(outputs))
+        queue.workers.shutdown()
+        self.assertEqual(queue.workers.workers, [])
+
+    def test_stop_and_timeout(self):
+        queue = quick.JobQueue(max_jobs=3)
+        argv = ["group", "spin"]
+        timed = queue.submit(quick.Job(group, argv, new_thread=True,
+                                       timeout=0.2))
+        stopped = queue.submit(quick.Job(group, argv, new_thread=True))
+        process = queue.submit(quick.Job(group, argv, new_process=True))
+        queued = queue.submit(quick.Job(group, argv, new_thread=True))
+        QTest.qWait(100)
+        for job in [stopped, process, queued]:
+            queue.stop(job)
+        self.assertTrue(wait_until(lambda: not queue.running(), 10000))
+        self.assertEqual([j.state for j in queue.jobs],
+                         [quick.Job.STOPPED]*3 + [quick.Job.CANCELLED])
+        self.assertFalse(quick.stop_requested())
+
+        # a stop landing between the end of the run and its report
+        late = queue.submit(quick.Job(group, ["group", "first"],
+                                      new_thread=True))
+        queue.threadpool.waitForDone()
+        self.assertEqual(late.state, quick.Job.RUNNING)
+        queue.stop(late)
+        self.assertTrue(wait_until(lambda: not queue.running()))
+        self.assertEqual((late.state, late.exit_code), (quick.Job.DONE, 0))
+
+    def test_async_commands(self):
+        queue = quick.JobQueue(max_jobs=10)
+        streams = [quick.GuiStream(max_latency=10) for i in range(6)]
+        outputs = [[] for stream in streams]
+        stdout = sys.stdout
+        sys.stdout = quick.StreamRouter(quick.GuiStream())
+        try:
+            for stream, out in zip(streams, outputs):
+                stream.textWritten.connect(out.append)
+                job = quick.Job(group, ["group", "nap", "--delay", "0.3"])
+                job.stream = stream
+                queue.submit(job)
+            queue.stop(queue.jobs[-1])
+            start = time.perf_counter()
+            self.assertTrue(wait_until(lambda: not queue.running()))
+        finally:
+            sys.stdout = stdout
+        # the runs awaited at the same time on one loop
+        self.assertLess(time.perf_counter() - start, 0.3 * 3)
+        self.assertEqual([j.state for j in queue.jobs],
+                         [quick.Job.DONE]*5 + [quick.Job.STOPPED])
+        self.assertTrue(wait_until(lambda: all(outputs)))
+        self.assertIn("nap 0.3", "".join(outputs[0]))
+        self.assertIn("[stopped]", "".join(outputs[-1]))
+
+    def test_command_context(self):
+        path = os.path.join(tempfile.mkdtemp(), "lines.txt")
+        with open(path, "w") as f:
+            f.write("hello\nworld\n")
+        modes = [(False, False), (True, False), (False, True),
+                 (False, "worker")]
+        queue = quick.JobQueue(max_jobs=8)
+        outputs = []
+        stdout = sys.stdout
+        sys.stdout = quick.StreamRouter(quick.GuiStream())
+        try:
+            for new_thread, new_process in modes:
+                for argv in [["head", "--src", path], ["leave", "--code", "3"]]:
+                    stream = quick.GuiStream(max_latency=10)
+                    out = []
+                    stream.textWritten.connect(out.append)
+                    outputs.append(out)
+                    job = quick.Job(group, ["group"] + argv,
+                                    new_thread=new_thread,
+                                    new_process=new_process)
+                    job.stream = stream
+                    queue.submit(job)
+            self.assertTrue(wait_until(lambda: not queue.running(), 30000))
+        finally:
+            sys.stdout = stdout
+        self.assertEqual([j.exit_code for j in queue.jobs], [0, 3] * 4)
+        self.assertEqual([j.state for j in queue.jobs],
+                         [quick.Job.DONE, quick.Job.FAILED] * 4)
+        for out in outputs[::2]:
+            self.assertTrue(wait_until(lambda: "head hello" in "".join(out)))
+        queue.workers.shutdown()
+
+    def test_progress_bars(self):
+        tabs = quick.OutputTabs(latency=10)
+        quick.install_progressbar()
+        stdout = sys.stdout
+        sys.stdout = quick.StreamRouter(tabs.default)
+        try:
+            stream = tabs.add_stream("crunch")
+            queue = quick.JobQueue()
+            job = quick.Job(group, ["group", "crunch"], new_thread=True)
+            job.stream = stream
+            queue.submit(job)
+            self.assertTrue(wait_until(lambda: not queue.running()))
+        finally:
+            sys.stdout = stdout
+        self.assertTrue(wait_until(lambda: stream in tabs.panes and
+                                   tabs.panes[stream].bars))
+        state, bar, shown = tabs.panes[stream].bars[0]
+        self.assertTrue(state.done)
+        self.assertEqual(state.pos, 100000)
+        self.assertTrue(wait_until(lambda: bar.value() == 1000))
+        # nothing but the argument list, no redraws
+        self.assertEqual(tabs.panes[stream].edit.toPlainText(),
+                         "['group', 'crunch']\n")
+
+    def test_job_output_routing(self):
+        streams = [quick.GuiStream(max_latency=10) for i in range(2)]
+        outputs = [[], []]
+        for stream, out in zip(streams, outputs):
+            stream.textWritten.connect(out.append)
+        queue = quick.JobQueue(max_jobs=2)
+        stdout = sys.stdout
+        sys.stdout = quick.StreamRouter(quick.GuiStream())
+        try:
+            for stream, value in zip(streams, ["a", "b"]):
+                job = quick.Job(group, ["group", "second", "--name", value],
+                                new_thread=True)
+                job.stream = stream
+                queue.submit(job)
+            self.assertTrue(wait_until(lambda: all(outputs)))
+        finally:
+            sys.stdout = stdout
+        self.assertIn("'a'", outputs[0][0])
+        self.assertNotIn("'b'", outputs[0][0])
+        self.assertIn("'b'", outputs[1][0])
+
+    def test_profiler(self):
+        profiler = quick.Profiler()
+        names = []
+        profiler.add_callback(lambda event: names.append(event["name"]))
+        with profiler.phase("outer", command="group"):
+            with profiler.phase("inner"):
+                pass
+        self.assertEqual(names, ["inner", "outer"])
+        trace = profiler.trace_events()["traceEvents"]
+        self.assertEqual(trace[1]["args"], {"command": "group"})
+        self.assertGreaterEqual(trace[1]["dur"], trace[0]["dur"])
+        self.assertIn("outer", profiler.report())
+
+        from quick._trace import profile_target
+        environ = os.environ.get("QUICK_PROFILE")
+        try:
+            for value, target in [("0", None), ("", None), ("1", "1"),
+                                  ("t.json", "t.json")]:
+                os.environ["QUICK_PROFILE"] = value
+                self.assertEqual(profile_target(), target)
+            self.assertIsNone(profile_target(False))
+            self.assertEqual(profile_target(True), True)
+        finally:
+            if environ is None:
+                del os.environ["QUICK_PROFILE"]
+            else:
+                os.environ["QUICK_PROFILE"] = environ
+
+    def test_gui_stream_batches(self):
+        stream = quick.GuiStream(max_latency=10, max_batch=1 << 20)
+        batches = []
+        stream.textWritten.connect(batches.append)
+        for i in range(1000):
+            stream.write("line %d\n" % i)
+        self.assertEqual(batches, [])
+        QTest.qWait(50)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0].count("\n"), 1000)
+
+    def test_job_panes_are_recycled(self):
+        tabs = quick.OutputTabs(latency=10)
+        tabs.max_panes = 4
+        fds = len(os.listdir("/proc/self/fd"))
+        for i in range(200):
+            stream = tabs.add_stream("#{}".format(i))
+            stream.write("job {}\n".format(i))
+            tabs.finish_stream(stream)
+        self.assertEqual(tabs.count(), 4)
+        self.assertLessEqual(len(os.listdir("/proc/self/fd")), fds)
+        self.assertEqual(tabs.widget(3).edit.toPlainText(), "job 199\n")
+        silent = tabs.add_stream("silent")
+        tabs.finish_stream(silent)
+        QtCore.QCoreApplication.sendPostedEvents(
+                None, QtCore.QEvent.DeferredDelete)
+        # the streams of finished jobs go with their panes, or at once
+        self.assertEqual(len(tabs.findChildren(quick.GuiStream)), 4 + 1)
+        # running jobs keep their pane
+        running = [tabs.add_stream("running") for i in range(6)]
+        for stream in running:
+            stream.write("busy\n")
+            stream.flush()
+        self.assertEqual(tabs.count(), 6)
+        self.assertTrue(all(stream in tabs.panes for stream in running))
+
+    def test_output_scrollback(self):
+        edit = quick.OutputEdit(max_lines=100, max_chars=1000)
+        for i in range(50):
+            edit.print("".join("line %d\n" % (i*100+j) for j in range(100)))
+        self.assertLessEqual(edit.document().characterCount(), 1000)
+        self.assertTrue(edit.toPlainText().endswith("line 4999\n"))
+        # nothing was dropped from a short output, no log was needed
+        short = quick.OutputEdit(max_lines=100, max_chars=1000)
+        short.print("line\n")
+        self.assertIsNone(short.log_path)
+        edit.open_log().flush()
+        pager = quick._LogPager(edit.log_path, page_size=1024)
+        self.assertGreater(len(pager), 1)
+        text = "".join(pager.page(i) for i in range(len(pager)))
+        self.assertEqual(text.count("\n"), 5000)
+        self.assertTrue(pager.page(0).startswith("line 0\n"))
+        pager.close()
+
+_lightweight_script = """
+import sys
+import click
+import quick
+
+@quick.gui_option
+@click.command()
+def cli():
+    print("terminal")
+
+try:
+    cli([], standalone_mode=False)
+finally:
+    heavy = [m for m in ("PyQt5", "qdarkstyle") if m in sys.modules]
+    print(",".join(heavy) or "lightweight")
+"""
+
+_run_exit_script = """
+import asyncio, sys
+import click
+from PyQt5 import QtCore, QtWidgets
+import quick
+
+@click.command()
+@click.option("--code", type=int, default=0)
+async def slow(code):
+    await asyncio.sleep(0.05)
+    print("body ran")
+    sys.exit(code)
+
+app = QtWidgets.QApplication([])
+QtCore.QTimer.singleShot(10000, lambda: app.exit(99))
+jobs = quick.JobQueue()
+jobs.submit(quick.Job(slow, ["slow", "--code", sys.argv[1]], run_exit=True,
+                      new_thread=sys.argv[2] == "thread"))
+print("exec returned", app.exec_())
+"""
+
+class TestImport(unittest.TestCase):
+    def test_gui_option_does_not_import_qt(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+                [root] + env.get("PYTHONPATH", "").split(os.pathsep))
+        out = subprocess.check_output(
+                [sys.executable, "-c", _lightweight_script],
+                env=env, universal_newlines=True)
+        self.assertEqual(out.split(), ["terminal", "lightweight"])
+
+    def test_run_exit_awaits_command(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+                [root] + env.get("PYTHONPATH", "").split(os.pathsep))
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        for code in ["0", "3"]:
+            for mode in ["inline", "thread"]:
+                proc = subprocess.run(
+                        [sys.executable, "-c", _run_exit_script, code, mode],
+                        env=env, stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL, universal_newlines=True,
+                        timeout=60)
+                self.assertIn("body ran", proc.stdout)
+                self.assertNotIn("exec returned", proc.stdout)
+                self.assertEqual(proc.returncode, int(code))
+
 if __name__ == "__main__":
     unittest.main()